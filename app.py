@@ -1,57 +1,184 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
 import os
-from datetime import datetime, timezone
-from typing import List, Dict, Any
-
-from flask import Flask, render_template, jsonify, redirect, url_for
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Any, Awaitable, Callable, Optional, Tuple, TypeVar
+
+import aiohttp
+from flask import Blueprint, Flask, Response, g, render_template, jsonify, redirect, request, stream_with_context, url_for
+import numpy as np
 import pandas as pd
-import joblib
 
-from src.config import Paths, DEFAULT_COIN, DEFAULT_INTERVAL
-from src.hyperliquid_api import get_current_funding_for_coin, get_predicted_funding_for_coin
+from src import hyperliquid_async as hl_async
+from src.artifact import KIND_CLASSIFIER, KIND_REGRESSOR, Ensemble, ensemble_path, load_ensemble
+from src.batch_predict import batch_span, predict_batch
+from src.downsample import lttb_indices
+from src.funding_store import FundingStore, realized_after
+from src.monitor import SharedMonitor
+from src.profiling import profile_run
+from src.circuit import CircuitOpenError, breaker_states
+from src.config import Paths, DEFAULT_COIN, DEFAULT_INTERVAL, SUMMARY_DEADLINES_SEC, UPSTREAM_CALL_TIMEOUT_SEC
+from src.hyperliquid_api import extract_current_funding, extract_predicted_funding
 from src.features import build_features
 from src.fetch_data import merge_on_hour, funding_df, candles_df
 from src.utils import ensure_dir, now_ms, days_ago_ms, floor_hour_ms
 from src.hyperliquid_api import fetch_funding_history, fetch_candles
 
 
-app = Flask(__name__)
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint("main", __name__)
 paths = Paths()
 ensure_dir(paths.data_dir)
 ensure_dir(paths.models_dir)
+monitor = SharedMonitor(paths.monitor_state, paths.predictions_log)
+funding_store = FundingStore(DEFAULT_COIN, paths.funding_store_dir)
+
+
+# Per-request profiling, triggered by ?profile=1 or an "X-Profile: 1" header. The hooks
+# are only registered when PROFILE_REQUESTS=1, so normal serving pays nothing for them.
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0") == "1"
+# One profiled request at a time per process; others are served unprofiled
+_profile_lock = threading.Lock()
 
 
-def load_cls_model():
-    payload = joblib.load(paths.cls_model_file)
-    return payload["models"], payload["feature_cols"]
+def _end_request_profile(exc: BaseException | None = None) -> Dict[str, Any] | None:
+    ctx = g.pop("profile_ctx", None)
+    if ctx is None:
+        return None
+    try:
+        ctx.__exit__(type(exc) if exc else None, exc, None)
+    finally:
+        _profile_lock.release()
+    return g.pop("profile_report", None)
 
 
-def load_reg_model():
-    payload = joblib.load(paths.model_file)
-    return payload["models"], payload["feature_cols"]
+def _begin_request_profile() -> None:
+    wanted = request.args.get("profile") == "1" or request.headers.get("X-Profile") == "1"
+    if wanted and _profile_lock.acquire(blocking=False):
+        ctx = profile_run(f"http-{request.endpoint or 'unknown'}", True)
+        g.profile_report = ctx.__enter__()
+        g.profile_ctx = ctx
 
 
-def latest_dataset(days: int = 7) -> pd.DataFrame:
+def _attach_request_profile(response: Response) -> Response:
+    # Streamed bodies are produced after this point and are not covered
+    report = _end_request_profile()
+    if report is not None:
+        response.headers["X-Profile-File"] = os.path.basename(report["prof"])
+    return response
+
+
+def _abort_request_profile(exc: BaseException | None) -> None:
+    _end_request_profile(exc)
+
+
+# Under gunicorn the master preloads models before forking and reloads them on HUP,
+# so workers keep sharing one copy instead of re-reading the file on change.
+MODEL_AUTO_RELOAD = os.getenv("MODEL_AUTO_RELOAD", "1") == "1"
+_model_cache: Dict[str, Tuple[str, float, Ensemble]] = {}
+_model_lock = threading.Lock()
+
+
+def _model_sources() -> Dict[str, Tuple[str, str]]:
+    return {
+        KIND_CLASSIFIER: (paths.cls_model_artifact, paths.cls_model_file),
+        KIND_REGRESSOR: (paths.model_artifact, paths.model_file),
+    }
+
+
+def _load_model(kind: str, force: bool = False) -> Ensemble:
+    artifact, pickle_path = _model_sources()[kind]
+    cached = _model_cache.get(kind)
+    if cached is not None and not force:
+        if not MODEL_AUTO_RELOAD:
+            return cached[2]
+        source = ensemble_path(artifact, pickle_path)
+        if source == cached[0] and source is not None and os.path.getmtime(source) == cached[1]:
+            return cached[2]
+    with _model_lock:
+        source = ensemble_path(artifact, pickle_path) or pickle_path
+        mtime = os.path.getmtime(source)
+        ensemble = load_ensemble(artifact, pickle_path, kind)
+        _model_cache[kind] = (source, mtime, ensemble)
+    # A model appeared after a failed warm-up: let the next /ready warm up again
+    _reset_failed_warm_up()
+    return ensemble
+
+
+def load_cls_model() -> Ensemble:
+    return _load_model(KIND_CLASSIFIER)
+
+
+def load_reg_model() -> Ensemble:
+    return _load_model(KIND_REGRESSOR)
+
+
+def model_files() -> List[str]:
+    return [p for pair in _model_sources().values() for p in pair]
+
+
+def preload_models() -> Dict[str, float]:
+    """(Re)load every model present on disk into the process cache. Returns path -> mtime."""
+    loaded: Dict[str, float] = {}
+    for kind, (artifact, pickle_path) in _model_sources().items():
+        if ensemble_path(artifact, pickle_path) is not None:
+            _ = _load_model(kind, force=True)
+            loaded[_model_cache[kind][0]] = _model_cache[kind][1]
+    return loaded
+
+
+def latest_frames(days: int = 7) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Raw funding events and the merged dataset for the last `days` days."""
     end = now_ms()
     start = days_ago_ms(days)
     fundings = fetch_funding_history(DEFAULT_COIN, start, end)
     candles = fetch_candles(DEFAULT_COIN, DEFAULT_INTERVAL, start, end)
     fdf = funding_df(fundings)
     cdf = candles_df(candles)
-    merged = merge_on_hour(fdf, cdf)
+    return fdf, merge_on_hour(fdf, cdf)
+
+
+def latest_dataset(days: int = 7) -> pd.DataFrame:
+    _, merged = latest_frames(days)
+    return merged
+
+
+async def latest_frames_async(session: aiohttp.ClientSession, days: int = 7) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Raw funding events and the merged dataset for the last `days` days."""
+    end = now_ms()
+    start = days_ago_ms(days)
+    fundings, candles = await asyncio.gather(
+        hl_async.fetch_funding_history(session, DEFAULT_COIN, start, end),
+        hl_async.fetch_candles(session, DEFAULT_COIN, DEFAULT_INTERVAL, start, end),
+    )
+    fdf = funding_df(fundings)
+    return fdf, merge_on_hour(fdf, candles_df(candles))
+
+
+async def latest_dataset_async(session: aiohttp.ClientSession, days: int = 7) -> pd.DataFrame:
+    _, merged = await latest_frames_async(session, days)
     return merged
 
 
-def predict_direction() -> Dict[str, Any]:
-    models, feature_cols = load_cls_model()
-    df = latest_dataset(14)
-    df_feat = build_features(df).dropna().reset_index(drop=True)
+def predict_direction(df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    ensemble = load_cls_model()
+    feature_cols = ensemble.feature_cols
+    if df is None:
+        df = latest_dataset(14)
+    df_feat = build_features(df, columns=feature_cols).dropna().reset_index(drop=True)
     if df_feat.empty:
         return {"error": "Not enough data to predict"}
-    x_row = df_feat[feature_cols].astype(float).values[-1:]
-    import numpy as np
-    probas = np.array([m.predict_proba(x_row)[0, 1] for m in models])
+    x_row = df_feat[feature_cols].to_numpy(dtype=np.float64)[-1:]
+    probas = ensemble.predict_members(x_row)[0]
     p_mean = float(probas.mean())
     direction = "positive" if p_mean >= 0.5 else "negative"
     conf = p_mean if direction == "positive" else (1.0 - p_mean)
@@ -59,46 +186,41 @@ def predict_direction() -> Dict[str, Any]:
         "direction": direction,
         "prob_positive": p_mean,
         "confidence": conf,
-        "n_models": len(models),
+        "n_models": ensemble.n_models,
     }
 
 
-def predict_numeric() -> Dict[str, Any]:
-    models, feature_cols = load_reg_model()
-    df = latest_dataset(14)
-    df_feat = build_features(df).dropna().reset_index(drop=True)
+def predict_numeric(df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    ensemble = load_reg_model()
+    feature_cols = ensemble.feature_cols
+    if df is None:
+        df = latest_dataset(14)
+    df_feat = build_features(df, columns=feature_cols).dropna().reset_index(drop=True)
     if df_feat.empty:
         return {"error": "Not enough data"}
-    x_row = df_feat[feature_cols].astype(float).values[-1:]
-    import numpy as np
-    preds = np.array([m.predict(x_row)[0] for m in models])
-    return {"pred_next_funding": float(preds.mean()), "pred_std": float(preds.std()), "n_models": len(models)}
+    x_row = df_feat[feature_cols].to_numpy(dtype=np.float64)[-1:]
+    preds = ensemble.predict_members(x_row)[0]
+    return {"pred_next_funding": float(preds.mean()), "pred_std": float(preds.std()), "n_models": ensemble.n_models}
 
 
-def append_prediction_to_log(direction: str, prob_positive: float) -> None:
-    ts = datetime.now(timezone.utc).isoformat()
-    row = {
-        "time": ts,
-        "direction": direction,
-        "prob_positive": prob_positive,
-    }
-    if os.path.exists(paths.predictions_log):
-        df = pd.read_csv(paths.predictions_log)
-        df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-    else:
-        df = pd.DataFrame([row])
-    df.to_csv(paths.predictions_log, index=False)
+def monitor_snapshot(fdf: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """Resolve pending predictions against `fdf` (if given) and return the rolling metrics."""
+    with monitor.update() as mon:
+        if fdf is not None and not fdf.empty:
+            mon.resolve(fdf["time"].astype("int64"), fdf["fundingRate"].astype(float))
+        now = now_ms()
+        return {"accuracy": mon.accuracy(now), "metrics": mon.snapshot(now)}
 
 
-def realized_direction_after(ts_iso: str) -> str | None:
+def _iso_to_ms(ts_iso: str) -> int | None:
     try:
         ts = datetime.fromisoformat(ts_iso)
     except Exception:
         return None
-    start = int(ts.timestamp() * 1000)
-    end = now_ms()
-    fundings = fetch_funding_history(DEFAULT_COIN, start, end)
-    fdf = funding_df(fundings)
+    return int(ts.timestamp() * 1000)
+
+
+def _realized_from_funding(fdf: pd.DataFrame, start: int) -> str | None:
     if fdf.empty:
         return None
     next_events = fdf[fdf["time"] > start]
@@ -108,14 +230,16 @@ def realized_direction_after(ts_iso: str) -> str | None:
     return "positive" if rate > 0 else "negative"
 
 
-def compute_actual_direction() -> Dict[str, Any]:
+def _load_prediction_log() -> pd.DataFrame | None:
     if not os.path.exists(paths.predictions_log):
-        return {"message": "No predictions yet"}
+        return None
     logs = pd.read_csv(paths.predictions_log)
     if logs.empty:
-        return {"message": "No predictions yet"}
-    latest = logs.iloc[-1]
-    realized = realized_direction_after(str(latest["time"]))
+        return None
+    return logs
+
+
+def _comparison_payload(latest: pd.Series, realized: str | None) -> Dict[str, Any]:
     if realized is None:
         return {"message": "Awaiting realized funding"}
     correct = str(realized == latest["direction"]).lower()
@@ -128,64 +252,191 @@ def compute_actual_direction() -> Dict[str, Any]:
     }
 
 
-def compute_accuracy(max_days: int = 14) -> Dict[str, Any]:
-    if not os.path.exists(paths.predictions_log):
-        return {"count": 0, "correct": 0, "accuracy": None}
-    logs = pd.read_csv(paths.predictions_log)
-    if logs.empty:
-        return {"count": 0, "correct": 0, "accuracy": None}
-    cutoff_ms = days_ago_ms(max_days)
-    logs["time_ms"] = pd.to_datetime(logs["time"]).astype("int64") // 10**6
-    logs = logs[logs["time_ms"] >= cutoff_ms].reset_index(drop=True)
-    if logs.empty:
-        return {"count": 0, "correct": 0, "accuracy": None}
-    correct = 0
-    total = 0
-    for _, row in logs.iterrows():
-        realized = realized_direction_after(str(row["time"]))
-        if realized is None:
-            continue
-        total += 1
-        if realized == str(row["direction"]):
-            correct += 1
-    acc = (correct / total) if total > 0 else None
-    return {"count": total, "correct": correct, "accuracy": acc}
-
-
-@app.route("/")
-def index():
-    # Always serve the React dashboard
-    return redirect(url_for('dashboard'))
+async def _realized_directions_async(session: aiohttp.ClientSession, times: List[str]) -> List[str | None]:
+    """Resolve many log rows from a single funding-history fetch starting at the oldest row."""
+    starts = [_iso_to_ms(t) for t in times]
+    valid = [s for s in starts if s is not None]
+    if not valid:
+        return [None] * len(starts)
+    fundings = await hl_async.fetch_funding_history(session, DEFAULT_COIN, min(valid), now_ms())
+    fdf = funding_df(fundings)
+    return [None if s is None else _realized_from_funding(fdf, s) for s in starts]
 
 
-@app.route("/dashboard")
-def dashboard():
-    return render_template("dashboard.html")
+async def compute_actual_direction_async(session: aiohttp.ClientSession) -> Dict[str, Any]:
+    logs = _load_prediction_log()
+    if logs is None:
+        return {"message": "No predictions yet"}
+    latest = logs.iloc[-1]
+    realized = await _realized_directions_async(session, [str(latest["time"])])
+    return _comparison_payload(latest, realized[0])
 
 
-@app.route("/api/status")
-def api_status():
-    hl_current = get_current_funding_for_coin(DEFAULT_COIN) or {}
-    hl_pred = get_predicted_funding_for_coin(DEFAULT_COIN) or {}
-    pred = predict_direction()
-    return jsonify({
-        "hl_current": hl_current,
-        "hl_pred": hl_pred,
-        "prediction": pred,
-    })
+# Blocking work for the async endpoints (model scoring, monitor I/O) runs on a process-wide
+# pool. asyncio.run() joins its default executor before returning, so with to_thread a
+# request would still wait for a thread whose timeout had already fired.
+OFFLOAD_WORKERS = int(os.getenv("OFFLOAD_WORKERS", "4"))
+_offload_pool: Tuple[int, ThreadPoolExecutor] | None = None
+_offload_lock = threading.Lock()
 
 
-@app.route("/api/summary")
-def api_summary():
-    hl_current = get_current_funding_for_coin(DEFAULT_COIN) or {}
-    hl_pred = get_predicted_funding_for_coin(DEFAULT_COIN) or {}
-    cls = predict_direction()
-    reg = predict_numeric()
-    cmp_res = compute_actual_direction()
-    acc = compute_accuracy()
-
-    # Robust next funding time (ms)
-    now = now_ms()
+def _offload_executor() -> ThreadPoolExecutor:
+    global _offload_pool
+    with _offload_lock:
+        if _offload_pool is None or _offload_pool[0] != os.getpid():
+            # Pool threads do not survive a fork; each gunicorn worker starts its own
+            _offload_pool = (os.getpid(), ThreadPoolExecutor(OFFLOAD_WORKERS, thread_name_prefix="offload"))
+        return _offload_pool[1]
+
+
+async def _offload(fn: Callable[..., T], *args: Any) -> T:
+    return await asyncio.get_running_loop().run_in_executor(_offload_executor(), fn, *args)
+
+
+async def _bounded(awaitable: Awaitable[T], fallback: T, timeout: float, name: str) -> T:
+    """Await one upstream dependency, returning `fallback` on timeout or error."""
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        logger.warning("%s timed out after %.1fs", name, timeout)
+    except Exception:
+        logger.exception("%s failed", name)
+    return fallback
+
+
+# Last good value per summary component, served (flagged stale) when a component misses
+# its deadline or fails. Process-local: each worker keeps its own.
+_last_good: Dict[str, Tuple[float, Any]] = {}
+
+
+def _is_good(value: Any) -> bool:
+    return value is not None and not (isinstance(value, dict) and "error" in value)
+
+
+async def _component(name: str, awaitable: Awaitable[Any], fallback: Any, deadline: float, stale: Dict[str, Any]) -> Any:
+    """
+    Await one summary component until `deadline` (event-loop time). On a miss (timeout,
+    open circuit, error or an error payload) fall back to its last good value, recording
+    the reason and age in `stale`.
+    """
+    reason = "error"
+    try:
+        value = await asyncio.wait_for(awaitable, max(deadline - asyncio.get_running_loop().time(), 0.0))
+    except asyncio.TimeoutError:
+        logger.warning("%s missed its deadline", name)
+        reason = "timeout"
+    except CircuitOpenError as exc:
+        logger.warning("%s", exc)
+        reason = "circuit_open"
+    except Exception:
+        logger.exception("%s failed", name)
+    else:
+        if _is_good(value):
+            _last_good[name] = (time.time(), value)
+            return value
+    cached = _last_good.get(name)
+    if cached is None:
+        stale[name] = {"reason": reason, "age_seconds": None}
+        return fallback
+    stale[name] = {"reason": reason, "age_seconds": time.time() - cached[0]}
+    return cached[1]
+
+
+def summary_deadlines(overrides: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """SUMMARY_DEADLINES_SEC with `overrides` applied; the dataset must be due before its consumers."""
+    limits = {**SUMMARY_DEADLINES_SEC, **(overrides or {})}
+    early = [name for name in ("cls", "reg", "acc") if limits[name] <= limits["dataset"]]
+    if early:
+        raise ValueError(f"Summary deadlines for {', '.join(early)} must be later than the dataset deadline ({limits['dataset']}s)")
+    return limits
+
+
+def _log_dataset_failure(fut: "asyncio.Future[Any]") -> None:
+    # Also marks the exception retrieved when every consumer gave up before it arrived
+    if fut.cancelled():
+        return
+    exc = fut.exception()
+    if isinstance(exc, asyncio.TimeoutError):
+        logger.warning("latest_dataset missed its deadline")
+    elif exc is not None:
+        logger.error("latest_dataset failed", exc_info=exc)
+
+
+async def gather_summary_async(deadlines: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Run the independent upstream calls behind /api/summary concurrently, each under its
+    own deadline (SUMMARY_DEADLINES_SEC, from the start of the request). Both models
+    score the same 14-day dataset, fetched once.
+    """
+    limits = summary_deadlines(deadlines)
+    t0 = asyncio.get_running_loop().time()
+    due = {name: t0 + sec for name, sec in limits.items()}
+    stale: Dict[str, Any] = {}
+    async with aiohttp.ClientSession() as session:
+        frames = asyncio.ensure_future(asyncio.wait_for(latest_frames_async(session, 14), limits["dataset"]))
+        frames.add_done_callback(_log_dataset_failure)
+
+        # Consumers await the shared fetch through a shield, so one of them missing its
+        # deadline does not cancel the dataset for the others. A dataset timeout or error
+        # propagates, so _component records its real reason.
+        async def _predict(fn) -> Dict[str, Any]:
+            _, merged = await asyncio.shield(frames)
+            return await _offload(fn, merged)
+
+        async def _monitor() -> Dict[str, Any]:
+            # Resolves from the funding events already fetched for the models; no extra I/O
+            try:
+                fdf, _ = await asyncio.shield(frames)
+            except Exception:
+                fdf = None
+            return await _offload(monitor_snapshot, fdf)
+
+        # Unwrapped (not the get_*_for_coin helpers) so failures reach _component with their cause
+        async def _current() -> Optional[Dict[str, Any]]:
+            return extract_current_funding(await hl_async.get_meta_and_asset_ctxs(session), DEFAULT_COIN)
+
+        async def _predicted() -> Optional[Dict[str, Any]]:
+            return extract_predicted_funding(await hl_async.fetch_predicted_fundings(session), DEFAULT_COIN)
+
+        hl_current, hl_pred, cls, reg, cmp_res, mon = await asyncio.gather(
+            _component("hl_current", _current(), None, due["hl_current"], stale),
+            _component("hl_pred", _predicted(), None, due["hl_pred"], stale),
+            _component("cls", _predict(predict_direction), {"error": "Prediction failed"}, due["cls"], stale),
+            _component("reg", _predict(predict_numeric), {"error": "Prediction failed"}, due["reg"], stale),
+            _component("cmp", compute_actual_direction_async(session), {"message": "Awaiting realized funding"}, due["cmp"], stale),
+            _component("acc", _monitor(), {"accuracy": {"count": 0, "correct": 0, "accuracy": None}, "metrics": None}, due["acc"], stale),
+        )
+        frames.cancel()
+    return {
+        "hl_current": hl_current or {},
+        "hl_pred": hl_pred or {},
+        "cls": cls,
+        "reg": reg,
+        "cmp": cmp_res,
+        "acc": mon["accuracy"],
+        "monitor": mon["metrics"],
+        "stale": stale,
+    }
+
+
+async def gather_status_async(timeout: float = UPSTREAM_CALL_TIMEOUT_SEC) -> Dict[str, Any]:
+    async with aiohttp.ClientSession() as session:
+
+        async def _predict() -> Dict[str, Any]:
+            # Fetch on the loop so the timeout can cancel it; only the scoring is off-loaded
+            _, merged = await latest_frames_async(session, 14)
+            return await _offload(predict_direction, merged)
+
+        hl_current, hl_pred, pred = await asyncio.gather(
+            _bounded(hl_async.get_current_funding_for_coin(session, DEFAULT_COIN), None, timeout, "current_funding"),
+            _bounded(hl_async.get_predicted_funding_for_coin(session, DEFAULT_COIN), None, timeout, "predicted_funding"),
+            _bounded(_predict(), {"error": "Prediction failed"}, timeout, "predict_direction"),
+        )
+    return {"hl_current": hl_current or {}, "hl_pred": hl_pred or {}, "prediction": pred}
+
+
+def effective_next_funding_ms(hl_pred: Any, now: int) -> int:
+    """Robust next funding time (ms) from the predictedFundings payload."""
     raw_next = None
     if isinstance(hl_pred, dict):
         raw_next = hl_pred.get("nextFundingTime")
@@ -200,51 +451,370 @@ def api_summary():
         # If way in the future (rare), clamp to next hour
         if effective_next > now + 3 * 60 * 60 * 1000:
             effective_next = floor_hour_ms(now) + 60 * 60 * 1000
+    return int(effective_next)
+
+
+@bp.route("/")
+def index():
+    # Always serve the React dashboard
+    return redirect(url_for('.dashboard'))
+
+
+@bp.route("/dashboard")
+def dashboard():
+    return render_template("dashboard.html")
+
+
+@bp.route("/api/status")
+def api_status():
+    return jsonify(asyncio.run(gather_status_async()))
 
+
+SUMMARY_FIELDS = {
+    "hl_current": "liveFunding",
+    "hl_pred": "nextFundingTime",
+    "cls": "predictedDirection",
+    "reg": "predictedFundingRate",
+    "cmp": "lastComparison",
+    "acc": "accuracy",
+}
+
+
+@bp.route("/api/summary")
+def api_summary():
+    res = asyncio.run(gather_summary_async())
+    now = now_ms()
     return jsonify({
-        "predictedFundingRate": reg,
-        "predictedDirection": cls,
-        "liveFunding": hl_current,
-        "nextFundingTime": int(effective_next),
-        "lastComparison": cmp_res,
-        "accuracy": acc,
+        "predictedFundingRate": res["reg"],
+        "predictedDirection": res["cls"],
+        "liveFunding": res["hl_current"],
+        "nextFundingTime": effective_next_funding_ms(res["hl_pred"], now),
+        "lastComparison": res["cmp"],
+        "accuracy": res["acc"],
+        "monitor": res["monitor"],
+        # Components served from their last good value (or fallback), with reason and age
+        "stale": {SUMMARY_FIELDS[k]: v for k, v in res["stale"].items()},
+        "degraded": bool(res["stale"]),
+        "circuits": breaker_states(),
         "coin": DEFAULT_COIN,
         "serverTime": int(now),
         "fundingIntervalSeconds": 3600,
     })
 
 
-@app.route("/api/history")
+def _param_list(body: Dict[str, Any], name: str) -> List[Any] | None:
+    """A list parameter from the JSON body, or comma-separated (in the body or query string)."""
+    raw = body[name] if name in body else request.args.get(name)
+    if raw is None or isinstance(raw, list):
+        return raw
+    if isinstance(raw, str):
+        return raw.split(",") if raw else None
+    raise ValueError(f"{name} must be a list or a comma-separated string")
+
+
+def _param_int(body: Dict[str, Any], name: str) -> int | None:
+    value = body.get(name, request.args.get(name))
+    return int(value) if value is not None else None
+
+
+def _query_int(name: str) -> int | None:
+    value = request.args.get(name)
+    return int(value) if value is not None else None
+
+
+@bp.route("/api/predict/batch", methods=["GET", "POST"])
+def api_predict_batch():
+    body = request.get_json(silent=True)
+    if body is None:
+        body = {}
+    elif not isinstance(body, dict):
+        return jsonify({"error": "JSON body must be an object"}), 400
+    try:
+        raw_ts = _param_list(body, "timestamps")
+        timestamps = [int(t) for t in raw_ts] if raw_ts is not None else None
+        start = _param_int(body, "start")
+        end = _param_int(body, "end")
+    except (TypeError, ValueError):
+        return jsonify({"error": "timestamps, start and end must be integer milliseconds"}), 400
+    try:
+        coins = _param_list(body, "coins")
+        batch_span(timestamps, start, end, coins)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    rows = predict_batch(timestamps, start, end, coins, cls_model=load_cls_model(), reg_model=load_reg_model())
+
+    def generate():
+        try:
+            for row in rows:
+                yield json.dumps(row) + "\n"
+        except Exception as exc:
+            logger.exception("Batch prediction failed")
+            yield json.dumps({"error": str(exc)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+HISTORY_DEFAULT_MS = 3 * 24 * 60 * 60 * 1000
+HISTORY_MAX_POINTS = 500
+
+
+def _history_predictions(
+    recs: Any, start: int, end: int, since: int | None, predictions_since: int | None, limit: int
+) -> Tuple[List[Dict[str, Any]], int | None]:
+    """
+    Predictions in [start, end] for the history chart, and the predictions cursor. When
+    polling, returns predictions made after `predictions_since` plus older ones whose
+    outcome arrived after `since` (the funding cursor), so each row is sent when it is
+    made and once more when it resolves.
+    """
+    logs = _load_prediction_log()
+    if logs is None:
+        return [], predictions_since
+    pred_ms = (pd.to_datetime(logs["time"], utc=True, format="ISO8601").astype("int64") // 10**6).to_numpy()
+    ev_time, ev_rate = realized_after(recs, pred_ms)
+    keep = (pred_ms >= start) & (pred_ms <= end)
+    made = pred_ms[pred_ms <= end]
+    cursor = int(made.max()) if len(made) else predictions_since
+    if since is not None:
+        fresh = pred_ms > (predictions_since if predictions_since is not None else since)
+        keep &= fresh | (ev_time > since)
+    idx = np.flatnonzero(keep)[-limit:]
+    preds = []
+    for i in idx:
+        direction = str(logs["direction"].iat[i])
+        realized = None if ev_time[i] < 0 else ("positive" if ev_rate[i] > 0 else "negative")
+        preds.append({
+            "time": str(logs["time"].iat[i]),
+            "direction": direction,
+            "prob_positive": float(logs["prob_positive"].iat[i]) if "prob_positive" in logs.columns else 0.0,
+            "realized": realized,
+            "correct": realized == direction,
+        })
+    return preds, cursor
+
+
+@bp.route("/api/history")
 def api_history():
-    # Return recent funding history and predictions log for charting
-    end = now_ms()
-    start = days_ago_ms(3)
-    fundings = fetch_funding_history(DEFAULT_COIN, start, end)
-    fdf = funding_df(fundings)
+    """
+    Funding history and predictions log for charting, served from the local funding store.
+    Query params (ms): `start`/`end` (default the last 3 days), `max_points` (series longer
+    than this are downsampled with LTTB), `since` (funding events after it, plus
+    predictions that resolved after it) and `predictions_since` (predictions made after
+    it; defaults to `since`). To poll for deltas pass the returned `cursor` as `since` and
+    `predictionsCursor` as `predictions_since`. If the store cannot sync, what it already
+    holds is served with `degraded` set.
+    """
+    try:
+        since = _query_int("since")
+        predictions_since = _query_int("predictions_since")
+        end = _query_int("end")
+        start = _query_int("start")
+        max_points = _query_int("max_points") or HISTORY_MAX_POINTS
+    except ValueError:
+        return jsonify({"error": "start, end, since, predictions_since and max_points must be integers"}), 400
+    if end is None:
+        end = now_ms()
+    if start is not None and start > end:
+        return jsonify({"error": "start is after end"}), 400
+    floor = funding_store.floor_ms()
+    if start is None:
+        # A poll only needs newer funding events, but predictions made before `since` can
+        # still resolve after it, so their range is not narrowed
+        sync_start = since + 1 if since is not None else end - HISTORY_DEFAULT_MS
+        pred_start = floor if since is not None else sync_start
+    else:
+        sync_start = pred_start = start
+    # Nothing older than the store's backfill floor is ever fetched or served
+    sync_start, pred_start = max(sync_start, floor), max(pred_start, floor)
+    max_points = max(max_points, 3)
+
+    stale: Dict[str, Any] = {}
+    try:
+        recs = funding_store.sync(sync_start)
+    except CircuitOpenError as exc:
+        logger.warning("%s", exc)
+        stale["fundingHistory"] = {"reason": "circuit_open"}
+        recs = funding_store.records()
+    except Exception:
+        logger.exception("Funding store sync failed")
+        stale["fundingHistory"] = {"reason": "error"}
+        recs = funding_store.records()
+    lo = max(sync_start, since + 1) if since is not None else sync_start
+    window = recs[(recs["time"] >= lo) & (recs["time"] <= end)]
+    downsampled = len(window) > max_points
+    if downsampled:
+        window = window[lttb_indices(window["time"], window["fundingRate"], max_points)]
+    rates = window["fundingRate"]
     hist = [
-        {"time": int(row["time"]), "fundingRate": float(row["fundingRate"]) if pd.notna(row["fundingRate"]) else None}
-        for _, row in fdf.tail(500).iterrows()
+        {"time": t, "fundingRate": (r if r == r else None)}
+        for t, r in zip(window["time"].tolist(), rates.tolist())
     ]
-    preds = []
-    if os.path.exists(paths.predictions_log):
-        logs = pd.read_csv(paths.predictions_log)
-        for _, row in logs.tail(200).iterrows():
-            realized = realized_direction_after(str(row["time"]))
-            preds.append({
-                "time": str(row["time"]),
-                "direction": str(row["direction"]),
-                "prob_positive": float(row.get("prob_positive", 0.0)),
-                "realized": realized,
-                "correct": realized == str(row["direction"]),
-            })
-    return jsonify({"fundingHistory": hist, "predictionsLog": preds})
-
-
-@app.route("/health")
+    in_range = recs["time"][recs["time"] <= end]
+    cursor = int(in_range[-1]) if len(in_range) else since
+    preds, predictions_cursor = _history_predictions(recs, pred_start, end, since, predictions_since, max_points)
+    return jsonify({
+        "fundingHistory": hist,
+        "predictionsLog": preds,
+        "start": sync_start,
+        "end": end,
+        "downsampled": downsampled,
+        "cursor": cursor,
+        "predictionsCursor": predictions_cursor,
+        "stale": stale,
+        "degraded": bool(stale),
+    })
+
+
+@bp.route("/health")
 def health():
     return jsonify({"status": "ok"})
 
 
+@bp.route("/ready")
+def ready():
+    """503 until warm-up has finished (and while it has failed); reports how long it took."""
+    state = warmup_state()
+    if state["status"] == "idle":
+        # Process never warmed (e.g. forked from a master that did not run it)
+        start_warm_up_thread()
+        state = warmup_state()
+    return jsonify(state), (200 if state["status"] == "ready" else 503)
+
+
+# Warm-up: pay the model load, first predict, dataset fetch and cache fills before the
+# first real request does. Status goes idle -> warming -> ready, or -> failed when model
+# loading or the first predict errors (failures in the other steps are only reported).
+# A failed process goes back to idle once a model loads (or the master rewarms on reload).
+_warmup: Dict[str, Any] = {"status": "idle"}
+_warmup_lock = threading.Lock()
+WARMUP_REQUIRED_STEPS = ("models", "predict")
+
+
+def warmup_state() -> Dict[str, Any]:
+    with _warmup_lock:
+        state = dict(_warmup)
+    if state["status"] == "warming":
+        state["elapsed_seconds"] = time.perf_counter() - state.pop("_started")
+    else:
+        state.pop("_started", None)
+    return state
+
+
+def _warm_step(steps: Dict[str, Any], errors: Dict[str, str], name: str, fn: Callable[[], T]) -> T | None:
+    started = time.perf_counter()
+    try:
+        return fn()
+    except Exception as exc:
+        logger.exception("Warm-up step %s failed", name)
+        errors[name] = str(exc)
+        return None
+    finally:
+        steps[name] = time.perf_counter() - started
+
+
+def _preload_all_models() -> Dict[str, float]:
+    loaded = preload_models()
+    missing = [kind for kind in _model_sources() if kind not in _model_cache]
+    if missing:
+        raise FileNotFoundError(f"No model file for: {', '.join(missing)}")
+    return loaded
+
+
+def _dummy_predict(ensemble: Ensemble) -> None:
+    ensemble.predict_members(np.zeros((1, len(ensemble.feature_cols))))
+
+
+def _claim_warm_up() -> bool:
+    """Move idle -> warming; False if another caller already started (or finished) warm-up."""
+    with _warmup_lock:
+        if _warmup["status"] != "idle":
+            return False
+        _warmup.update(status="warming", _started=time.perf_counter())
+        return True
+
+
+def _reset_failed_warm_up() -> None:
+    with _warmup_lock:
+        if _warmup["status"] == "failed":
+            _warmup.clear()
+            _warmup["status"] = "idle"
+
+
+def warm_up() -> Dict[str, Any]:
+    """Run every warm-up step once and mark the process ready, or failed if it cannot serve."""
+    if not _claim_warm_up():
+        return warmup_state()
+    return _run_warm_up()
+
+
+def rewarm() -> Dict[str, Any]:
+    """Warm up again from scratch (reloading the models), e.g. in the master after new model files land."""
+    with _warmup_lock:
+        busy = _warmup["status"] == "warming"
+        if not busy:
+            _warmup.clear()
+            _warmup.update(status="warming", _started=time.perf_counter())
+    return warmup_state() if busy else _run_warm_up()
+
+
+def _run_warm_up() -> Dict[str, Any]:
+    started = time.perf_counter()
+    steps: Dict[str, float] = {}
+    errors: Dict[str, str] = {}
+    _warm_step(steps, errors, "models", _preload_all_models)
+    frames = _warm_step(steps, errors, "dataset", lambda: latest_frames(14))
+    _warm_step(steps, errors, "funding_store", lambda: funding_store.sync(now_ms() - HISTORY_DEFAULT_MS))
+    _warm_step(steps, errors, "monitor", lambda: monitor_snapshot(None if frames is None else frames[0]))
+    if frames is not None:
+        _warm_step(steps, errors, "predict", lambda: (predict_direction(frames[1]), predict_numeric(frames[1])))
+    else:
+        # No data; still take the first-predict cost on a dummy row
+        _warm_step(steps, errors, "predict", lambda: [_dummy_predict(_model_cache[k][2]) for k in list(_model_cache)])
+    failed = any(step in errors for step in WARMUP_REQUIRED_STEPS)
+    state = {
+        "status": "failed" if failed else "ready",
+        "warmup_seconds": time.perf_counter() - started,
+        "models": sorted(os.path.basename(entry[0]) for entry in _model_cache.values()),
+        "steps": steps,
+        "errors": errors,
+    }
+    with _warmup_lock:
+        _warmup.clear()
+        _warmup.update(state)
+    logger.info("Warm-up %s in %.2fs", state["status"], state["warmup_seconds"])
+    return state
+
+
+def start_warm_up_thread() -> None:
+    if _claim_warm_up():
+        threading.Thread(target=_run_warm_up, name="warm-up", daemon=True).start()
+
+
+def create_app(warm: str = "none") -> Flask:
+    """
+    Build the Flask app. `warm` runs the warm-up "sync" (before returning, e.g. in the
+    gunicorn master so forked workers start ready), in a "background" thread (dev server;
+    `/ready` flips once done) or not at all ("none"; the first `/ready` starts it).
+    """
+    summary_deadlines()  # fail at startup, not on the first /api/summary, on a bad config
+    flask_app = Flask(__name__)
+    flask_app.register_blueprint(bp)
+    if PROFILE_REQUESTS:
+        flask_app.before_request(_begin_request_profile)
+        flask_app.after_request(_attach_request_profile)
+        flask_app.teardown_request(_abort_request_profile)
+    if warm == "sync":
+        warm_up()
+    elif warm == "background":
+        start_warm_up_thread()
+    return flask_app
+
+
+# Module-level app for `flask run`, tests and older entry points; warm-up is left to the caller
+app = create_app()
+
+
 def _find_free_port(preferred: int = 8000, max_tries: int = 20) -> int:
     import socket
     port = preferred
@@ -266,5 +836,7 @@ if __name__ == "__main__":
     except ValueError:
         base_port = 8000
     port = _find_free_port(base_port)
+    start_warm_up_thread()
     print(f"Starting server on http://{host}:{port}")
-    app.run(host=host, port=port, debug=True, use_reloader=False, threaded=True) 
\ No newline at end of file
+    # Development server only; production runs `gunicorn -c gunicorn.conf.py wsgi:app`
+    app.run(host=host, port=port, debug=os.getenv("FLASK_DEBUG") == "1", use_reloader=False, threaded=True) 
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""
+Gunicorn settings for production serving.
+
+Models are loaded once in the master (preload_app) and shared copy-on-write by the
+forked workers. When a model file changes on disk the master reloads it and sends
+itself SIGHUP, which gracefully replaces the workers with ones forked from the new
+state. `kill -HUP <master pid>` does the same by hand.
+"""
+import gc
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+
+# One OpenMP thread per worker: sklearn predict is tiny per request and N workers
+# times N cores threads would oversubscribe the box. Must be set before sklearn loads.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+# Workers must not reload models themselves, or each would hold a private copy.
+os.environ.setdefault("MODEL_AUTO_RELOAD", "0")
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+MODEL_WATCH_INTERVAL_SEC = float(os.getenv("MODEL_WATCH_INTERVAL_SEC", "30"))
+
+
+def _model_mtimes():
+    import app as app_module
+
+    return {p: os.path.getmtime(p) for p in app_module.model_files() if os.path.exists(p)}
+
+
+def _watch_models(server):
+    seen = _model_mtimes()
+    while True:
+        time.sleep(MODEL_WATCH_INTERVAL_SEC)
+        try:
+            current = _model_mtimes()
+        except OSError:
+            # File replaced mid-write; check again next tick
+            continue
+        if current != seen:
+            seen = current
+            server.log.info("Model files changed; reloading workers")
+            os.kill(os.getpid(), signal.SIGHUP)
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's reach so GC passes in
+    # the workers do not write to (and un-share) the preloaded model pages.
+    gc.freeze()
+    if MODEL_WATCH_INTERVAL_SEC > 0:
+        threading.Thread(target=_watch_models, args=(server,), daemon=True).start()
+
+
+def on_reload(server):
+    import app as app_module
+
+    # Reload the models and warm up again before the new workers fork, so a master
+    # that booted without models stops handing them a failed readiness state
+    state = app_module.rewarm()
+    gc.freeze()
+    server.log.info("Reloaded models: %s (warm-up %s)", ", ".join(state.get("models", [])), state["status"])
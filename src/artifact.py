@@ -0,0 +1,368 @@
+"""
+Flat, memory-mappable model artifacts.
+
+The fold ensembles are HistGradientBoosting models (plus an isotonic calibrator per
+fold for the classifier). Export flattens every tree of every fold into contiguous
+node arrays and writes them to a single file:
+
+    magic (8s) | format version (u32) | reserved (u32) | header length (u64)
+    JSON header (padded to 64 bytes)
+    arrays, each 64-byte aligned
+
+The header records the kind, feature columns, per-array dtype/shape/offset and the
+SHA-256 of the array section. Loading maps the file read-only, so every process that
+serves the same artifact shares its pages, and evaluation needs only numpy.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .config import Paths
+
+
+MAGIC = b"HFMODEL\x00"
+FORMAT_VERSION = 1
+ALIGN = 64
+_PREAMBLE = struct.Struct("<8sIIQ")
+# Rows walked through every tree at once by FlatEnsemble
+ROW_CHUNK = 256
+
+KIND_REGRESSOR = "regressor"
+KIND_CLASSIFIER = "classifier"
+
+
+class ArtifactError(ValueError):
+    pass
+
+
+class Ensemble(Protocol):
+    kind: str
+    feature_cols: List[str]
+
+    @property
+    def n_models(self) -> int:
+        ...
+
+    def predict_members(self, X: NDArray[np.float64]) -> NDArray[np.float64]:
+        """Per-fold outputs, shape (n_rows, n_models): raw predictions or P(positive)."""
+        ...
+
+
+def _pad(n: int) -> int:
+    return (-n) % ALIGN
+
+
+def _flatten_hgb(estimator: Any) -> Tuple[List[NDArray[Any]], float, int]:
+    """Return (per-tree node arrays, baseline, max depth) for a fitted single-output HGB model."""
+    if getattr(estimator, "_preprocessor", None) is not None:
+        raise ArtifactError("Categorical preprocessing is not supported by the flat format")
+    trees: List[NDArray[Any]] = []
+    max_depth = 0
+    for iteration in estimator._predictors:
+        if len(iteration) != 1:
+            raise ArtifactError("Only single-output (regression / binary) models are supported")
+        nodes = iteration[0].nodes
+        if np.any(nodes["is_categorical"]):
+            raise ArtifactError("Categorical splits are not supported by the flat format")
+        trees.append(nodes)
+        max_depth = max(max_depth, int(nodes["depth"].max()))
+    baseline = float(np.ravel(estimator._baseline_prediction)[0])
+    return trees, baseline, max_depth
+
+
+def _pack_trees(estimators: Sequence[Any]) -> Tuple[Dict[str, NDArray[Any]], int]:
+    feature_idx: List[NDArray[Any]] = []
+    threshold: List[NDArray[Any]] = []
+    left: List[NDArray[Any]] = []
+    right: List[NDArray[Any]] = []
+    missing_left: List[NDArray[Any]] = []
+    value: List[NDArray[Any]] = []
+    roots: List[int] = []
+    model_offsets = [0]
+    baselines: List[float] = []
+    max_depth = 0
+    n_nodes = 0
+    for est in estimators:
+        trees, baseline, depth = _flatten_hgb(est)
+        max_depth = max(max_depth, depth)
+        baselines.append(baseline)
+        for nodes in trees:
+            idx = np.arange(n_nodes, n_nodes + len(nodes))
+            leaf = nodes["is_leaf"].astype(bool)
+            roots.append(n_nodes)
+            # Leaves point at themselves so every tree can be walked a fixed max_depth steps
+            left.append(np.where(leaf, idx, nodes["left"].astype(np.int64) + n_nodes))
+            right.append(np.where(leaf, idx, nodes["right"].astype(np.int64) + n_nodes))
+            feature_idx.append(np.where(leaf, 0, nodes["feature_idx"]))
+            threshold.append(np.where(leaf, np.inf, nodes["num_threshold"]))
+            missing_left.append(nodes["missing_go_to_left"])
+            value.append(np.where(leaf, nodes["value"], 0.0))
+            n_nodes += len(nodes)
+        model_offsets.append(len(roots))
+    arrays = {
+        "feature_idx": np.concatenate(feature_idx).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "missing_left": np.concatenate(missing_left).astype(np.bool_),
+        "value": np.concatenate(value).astype(np.float64),
+        "tree_roots": np.asarray(roots, dtype=np.int32),
+        "model_tree_offsets": np.asarray(model_offsets, dtype=np.int64),
+        "baselines": np.asarray(baselines, dtype=np.float64),
+    }
+    return arrays, max_depth
+
+
+def _write(path: str, header: Dict[str, Any], arrays: Dict[str, NDArray[Any]]) -> None:
+    specs: Dict[str, Dict[str, Any]] = {}
+    offset = 0
+    for name, arr in arrays.items():
+        specs[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset += arr.nbytes + _pad(arr.nbytes)
+    digest = hashlib.sha256()
+    for arr in arrays.values():
+        digest.update(np.ascontiguousarray(arr).tobytes())
+        digest.update(b"\x00" * _pad(arr.nbytes))
+    header = {**header, "arrays": specs, "data_bytes": offset, "sha256": digest.hexdigest()}
+    header_bytes = json.dumps(header).encode("utf-8")
+    header_bytes += b" " * _pad(_PREAMBLE.size + len(header_bytes))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, 0, len(header_bytes)))
+        f.write(header_bytes)
+        for arr in arrays.values():
+            f.write(np.ascontiguousarray(arr).tobytes())
+            f.write(b"\x00" * _pad(arr.nbytes))
+    # Atomic swap so a serving process never maps a half-written file
+    os.replace(tmp, path)
+
+
+def export_regressor(models: Sequence[Any], feature_cols: List[str], path: str) -> None:
+    arrays, max_depth = _pack_trees(models)
+    _write(path, _base_header(KIND_REGRESSOR, feature_cols, len(models), max_depth), arrays)
+
+
+def export_classifier(models: Sequence[Any], feature_cols: List[str], path: str) -> None:
+    """Export prefit CalibratedClassifierCV(HistGradientBoostingClassifier, method="isotonic") folds."""
+    estimators: List[Any] = []
+    calib_x: List[NDArray[Any]] = []
+    calib_y: List[NDArray[Any]] = []
+    calib_offsets = [0]
+    for cal in models:
+        if len(cal.calibrated_classifiers_) != 1 or cal.calibrated_classifiers_[0].method != "isotonic":
+            raise ArtifactError("Expected one prefit isotonic calibrator per fold")
+        calibrated = cal.calibrated_classifiers_[0]
+        iso = calibrated.calibrators[0]
+        estimators.append(calibrated.estimator)
+        calib_x.append(np.asarray(iso.X_thresholds_, dtype=np.float64))
+        calib_y.append(np.asarray(iso.y_thresholds_, dtype=np.float64))
+        calib_offsets.append(calib_offsets[-1] + len(calib_x[-1]))
+    arrays, max_depth = _pack_trees(estimators)
+    arrays["calib_x"] = np.concatenate(calib_x)
+    arrays["calib_y"] = np.concatenate(calib_y)
+    arrays["calib_offsets"] = np.asarray(calib_offsets, dtype=np.int64)
+    _write(path, _base_header(KIND_CLASSIFIER, feature_cols, len(models), max_depth), arrays)
+
+
+def _base_header(kind: str, feature_cols: List[str], n_models: int, max_depth: int) -> Dict[str, Any]:
+    return {
+        "kind": kind,
+        "feature_cols": list(feature_cols),
+        "n_models": int(n_models),
+        "max_depth": int(max_depth),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+class FlatEnsemble:
+    """Read-only, memory-mapped view of an exported ensemble."""
+
+    def __init__(self, path: str, verify: bool = True):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _reserved, header_len = _PREAMBLE.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ArtifactError(f"{path} is not a model artifact")
+        if version != FORMAT_VERSION:
+            raise ArtifactError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+        self.header: Dict[str, Any] = json.loads(bytes(self._mm[_PREAMBLE.size:_PREAMBLE.size + header_len]))
+        data_start = _PREAMBLE.size + header_len
+        if verify:
+            data = memoryview(self._mm)[data_start:data_start + self.header["data_bytes"]]
+            actual = hashlib.sha256(data).hexdigest()
+            data.release()
+            if actual != self.header["sha256"]:
+                raise ArtifactError(f"{path} failed checksum verification")
+
+        self.kind: str = self.header["kind"]
+        self.feature_cols: List[str] = self.header["feature_cols"]
+        self.max_depth: int = self.header["max_depth"]
+        arrays: Dict[str, NDArray[Any]] = {}
+        for name, spec in self.header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            arrays[name] = np.frombuffer(self._mm, dtype=dtype, count=count, offset=data_start + spec["offset"]).reshape(spec["shape"])
+        self._arrays = arrays
+
+    @property
+    def n_models(self) -> int:
+        return int(self.header["n_models"])
+
+    def raw_members(self, X: NDArray[np.float64]) -> NDArray[np.float64]:
+        """Raw (pre-link) score of every fold model, shape (n_rows, n_models)."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.shape[0] <= ROW_CHUNK:
+            return self._raw_chunk(X)
+        # The per-level gathers are (n_rows, n_trees); chunk rows to keep them small
+        return np.concatenate([self._raw_chunk(X[i:i + ROW_CHUNK]) for i in range(0, X.shape[0], ROW_CHUNK)])
+
+    def _raw_chunk(self, X: NDArray[np.float64]) -> NDArray[np.float64]:
+        a = self._arrays
+        rows = np.arange(X.shape[0])[:, None]
+        # Walk every tree at once: one (n_rows, n_trees) gather per depth level
+        node = np.broadcast_to(a["tree_roots"], (X.shape[0], a["tree_roots"].shape[0])).copy()
+        for _ in range(self.max_depth):
+            x = X[rows, a["feature_idx"][node]]
+            go_left = np.where(np.isnan(x), a["missing_left"][node], x <= a["threshold"][node])
+            node = np.where(go_left, a["left"][node], a["right"][node])
+        leaf_values = np.asarray(a["value"][node], dtype=np.float64)
+        per_model = np.add.reduceat(leaf_values, a["model_tree_offsets"][:-1], axis=1)
+        return np.asarray(per_model + a["baselines"], dtype=np.float64)
+
+    def predict_members(self, X: NDArray[np.float64]) -> NDArray[np.float64]:
+        raw = self.raw_members(X)
+        if self.kind == KIND_REGRESSOR:
+            return raw
+        a = self._arrays
+        out = np.empty_like(raw)
+        offsets = a["calib_offsets"]
+        for k in range(raw.shape[1]):
+            lo, hi = int(offsets[k]), int(offsets[k + 1])
+            # Isotonic calibration on the decision function, clipped at the ends
+            out[:, k] = np.interp(raw[:, k], a["calib_x"][lo:hi], a["calib_y"][lo:hi])
+        return out
+
+
+class JoblibEnsemble:
+    """Adapter giving pickled sklearn fold lists the same interface as FlatEnsemble."""
+
+    def __init__(self, path: str, kind: str):
+        import joblib
+
+        payload = joblib.load(path)
+        self.path = path
+        self.kind = kind
+        self.models: List[Any] = payload["models"]
+        self.feature_cols: List[str] = payload["feature_cols"]
+
+    @property
+    def n_models(self) -> int:
+        return len(self.models)
+
+    def predict_members(self, X: NDArray[np.float64]) -> NDArray[np.float64]:
+        if self.kind == KIND_CLASSIFIER:
+            return np.column_stack([m.predict_proba(X)[:, 1] for m in self.models])
+        return np.column_stack([m.predict(X) for m in self.models])
+
+
+def artifact_for(pickle_path: str) -> str:
+    """The flat artifact exported alongside a fold pickle (same name, .hfm suffix)."""
+    return os.path.splitext(pickle_path)[0] + ".hfm"
+
+
+def ensemble_path(artifact_path: str, pickle_path: str) -> Optional[str]:
+    """The file `load_ensemble` would read: the flat artifact if present, else the pickle."""
+    for path in (artifact_path, pickle_path):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_ensemble(artifact_path: str, pickle_path: str, kind: str) -> Ensemble:
+    """Prefer the flat artifact; fall back to the joblib pickle for models trained before it existed."""
+    if os.path.exists(artifact_path):
+        ens = FlatEnsemble(artifact_path)
+        if ens.kind != kind:
+            raise ArtifactError(f"{artifact_path} holds a {ens.kind}, expected a {kind}")
+        return ens
+    return JoblibEnsemble(pickle_path, kind)
+
+
+_BENCH_SNIPPET = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+from src.artifact import FlatEnsemble, JoblibEnsemble
+ens = FlatEnsemble(sys.argv[2]) if sys.argv[1] == "flat" else JoblibEnsemble(sys.argv[2], sys.argv[3])
+import numpy as np
+ens.predict_members(np.zeros((1, len(ens.feature_cols))))
+print(json.dumps({
+    "cold_start_s": time.perf_counter() - t0,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    "imports_sklearn": "sklearn" in sys.modules,
+}))
+"""
+
+
+def _bench_one(mode: str, path: str, kind: str, repeats: int) -> Dict[str, Any]:
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", _BENCH_SNIPPET, mode, path, kind], cwd=root, capture_output=True, text=True)
+        if out.returncode != 0:
+            raise RuntimeError(out.stderr)
+        runs.append(json.loads(out.stdout))
+    return {
+        "file_mb": os.path.getsize(path) / 2**20,
+        "cold_start_s": float(np.median([r["cold_start_s"] for r in runs])),
+        "max_rss_mb": float(np.median([r["max_rss_mb"] for r in runs])),
+        "imports_sklearn": runs[0]["imports_sklearn"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export pickled ensembles to flat artifacts and compare load cost")
+    parser.add_argument("command", choices=["export", "bench"])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = Paths()
+    pairs = [
+        (KIND_REGRESSOR, paths.model_file, paths.model_artifact),
+        (KIND_CLASSIFIER, paths.cls_model_file, paths.cls_model_artifact),
+    ]
+    report: Dict[str, Any] = {}
+    for kind, pkl, flat in pairs:
+        if not os.path.exists(pkl):
+            continue
+        if args.command == "export":
+            payload = JoblibEnsemble(pkl, kind)
+            export_fn = export_classifier if kind == KIND_CLASSIFIER else export_regressor
+            export_fn(payload.models, payload.feature_cols, flat)
+            X = np.random.default_rng(0).normal(size=(256, len(payload.feature_cols)))
+            diff = np.abs(FlatEnsemble(flat).predict_members(X) - payload.predict_members(X)).max()
+            report[kind] = {"artifact": flat, "max_abs_diff_vs_joblib": float(diff)}
+        else:
+            if not os.path.exists(flat):
+                raise SystemExit(f"No artifact at {flat}. Run `python -m src.artifact export` first.")
+            report[kind] = {
+                "joblib": _bench_one("joblib", pkl, kind, args.repeats),
+                "flat": _bench_one("flat", flat, kind, args.repeats),
+            }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
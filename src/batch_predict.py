@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import sys
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, cast
+
+import numpy as np
+import pandas as pd
+
+from .artifact import KIND_CLASSIFIER, KIND_REGRESSOR, Ensemble, JoblibEnsemble, load_ensemble
+from .config import (
+    BATCH_CHUNK_ROWS,
+    BATCH_FLAT_MAX_ROWS,
+    BATCH_MAX_COINS,
+    BATCH_MAX_SPAN_DAYS,
+    BATCH_MAX_TIMESTAMPS,
+    DEFAULT_COIN,
+    DEFAULT_INTERVAL,
+    Paths,
+)
+from .features import build_features, feature_matrix, tail_rows_needed
+from .fetch_data import candles_df, funding_df, merge_on_hour
+from .hyperliquid_api import fetch_candles, fetch_funding_history
+from .utils import HOUR_MS, interval_ms, now_ms
+
+
+# candleSnapshot returns at most 5000 candles per request
+CANDLES_PER_REQUEST = 4000
+
+
+def _fetch_candles_range(coin: str, interval: str, start_ms: int, end_ms: int) -> List[Dict[str, Any]]:
+    step = CANDLES_PER_REQUEST * interval_ms(interval)
+    records: List[Dict[str, Any]] = []
+    for lo in range(start_ms, end_ms + 1, step):
+        records.extend(fetch_candles(coin, interval, lo, min(lo + step - 1, end_ms)))
+    return records
+
+
+def dataset_for_range(coin: str, start_ms: int, end_ms: int, interval: str = DEFAULT_INTERVAL) -> pd.DataFrame:
+    """Merged rows covering [start_ms, end_ms] plus enough earlier history to warm up the features."""
+    fetch_start = start_ms - tail_rows_needed() * HOUR_MS
+    # Funding events are stamped a few ms after their hour, so the hour at end_ms needs a
+    # little past it; rows beyond end_ms are dropped again by _select_rows
+    fundings = fetch_funding_history(coin, fetch_start, end_ms + HOUR_MS)
+    candles = _fetch_candles_range(coin, interval, fetch_start, end_ms)
+    return merge_on_hour(funding_df(fundings), candles_df(candles))
+
+
+def batch_span(
+    timestamps: Optional[Sequence[int]] = None,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+    coins: Optional[Sequence[str]] = None,
+) -> Tuple[int, int]:
+    """
+    The [lo, hi] range a batch request covers. Raises ValueError unless exactly one of
+    `timestamps` / `start_ms` is given, the span is within BATCH_MAX_SPAN_DAYS and there
+    are at most BATCH_MAX_COINS coins (each is a full fetch and scoring pass).
+    """
+    if coins is not None and len(coins) > BATCH_MAX_COINS:
+        raise ValueError(f"At most {BATCH_MAX_COINS} coins per request")
+    if timestamps is None and start_ms is None:
+        raise ValueError("Pass timestamps or a start/end range")
+    if timestamps is not None and (start_ms is not None or end_ms is not None):
+        raise ValueError("Pass either timestamps or a start/end range, not both")
+    if timestamps is not None:
+        if not timestamps:
+            raise ValueError("timestamps is empty")
+        if len(timestamps) > BATCH_MAX_TIMESTAMPS:
+            raise ValueError(f"At most {BATCH_MAX_TIMESTAMPS} timestamps per request")
+        lo, hi = int(min(timestamps)), int(max(timestamps))
+    else:
+        lo, hi = int(start_ms or 0), int(end_ms if end_ms is not None else now_ms())
+    if hi < lo:
+        raise ValueError("end is before start")
+    if hi - lo > BATCH_MAX_SPAN_DAYS * 24 * HOUR_MS:
+        raise ValueError(f"Span exceeds {BATCH_MAX_SPAN_DAYS} days; split the request")
+    return lo, hi
+
+
+def _select_rows(df_feat: pd.DataFrame, timestamps: Optional[Sequence[int]], start_ms: int, end_ms: int) -> pd.DataFrame:
+    hours = df_feat["hour"].to_numpy(dtype=np.int64)
+    if timestamps is None:
+        return cast(pd.DataFrame, df_feat[(hours >= start_ms) & (hours <= end_ms)])
+    # Each timestamp is scored on the latest hourly row at or before it. That row's candle
+    # is closed here, whereas the live path scores the hour's still-open candle
+    ts = np.asarray(timestamps, dtype=np.int64)
+    pos = np.searchsorted(hours, ts, side="right") - 1
+    keep = pos >= 0
+    rows = df_feat.iloc[pos[keep]].copy()
+    rows["requested_time"] = ts[keep]
+    return rows
+
+
+# Fold pickles for long batches, keyed by path and reloaded when the file changes
+_estimator_cache: Dict[str, Tuple[float, JoblibEnsemble]] = {}
+_estimator_lock = threading.Lock()
+
+
+def _fold_estimators(pickle_path: str, kind: str) -> Optional[JoblibEnsemble]:
+    """The sklearn fold models behind an ensemble, or None when only the flat artifact exists."""
+    try:
+        mtime = os.path.getmtime(pickle_path)
+    except OSError:
+        return None
+    with _estimator_lock:
+        cached = _estimator_cache.get(pickle_path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, JoblibEnsemble(pickle_path, kind))
+            _estimator_cache[pickle_path] = cached
+    return cached[1]
+
+
+def _scorer(model: Ensemble, pickle_path: str, n_rows: int) -> Ensemble:
+    """
+    The flat artifact walks every row through every tree at once, which wins for a few rows
+    but loses to sklearn's per-tree predict on many; switch to the fold pickle past
+    BATCH_FLAT_MAX_ROWS when it holds the same model.
+    """
+    if n_rows <= BATCH_FLAT_MAX_ROWS or isinstance(model, JoblibEnsemble):
+        return model
+    estimators = _fold_estimators(pickle_path, model.kind)
+    if estimators is None or estimators.feature_cols != model.feature_cols:
+        return model
+    return estimators
+
+
+def predict_batch(
+    timestamps: Optional[Sequence[int]] = None,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+    coins: Optional[Sequence[str]] = None,
+    cls_model: Optional[Ensemble] = None,
+    reg_model: Optional[Ensemble] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Score many timestamps (or every hour in [start_ms, end_ms]) for one or more coins.
+    Per coin the dataset is fetched and featurized once, then the ensembles score the rows
+    in vectorized chunks of BATCH_CHUNK_ROWS so memory stays bounded. Yields one dict per
+    scored row.
+    """
+    lo, hi = batch_span(timestamps, start_ms, end_ms, coins)
+    paths = Paths()
+    cls_model = cls_model or load_ensemble(paths.cls_model_artifact, paths.cls_model_file, KIND_CLASSIFIER)
+    reg_model = reg_model or load_ensemble(paths.model_artifact, paths.model_file, KIND_REGRESSOR)
+
+    # One featurization serves both models, so build the union of their inputs
+    columns = list(dict.fromkeys(cls_model.feature_cols + reg_model.feature_cols))
+    for coin in coins or [DEFAULT_COIN]:
+        df = dataset_for_range(coin, lo, hi)
+        if df.empty:
+            continue
+        df_feat = build_features(df, columns=columns).dropna().reset_index(drop=True)
+        rows = _select_rows(df_feat, timestamps, lo, hi)
+        if rows.empty:
+            continue
+        cls_scorer = _scorer(cls_model, paths.cls_model_file, len(rows))
+        reg_scorer = _scorer(reg_model, paths.model_file, len(rows))
+        for start in range(0, len(rows), BATCH_CHUNK_ROWS):
+            yield from _score_chunk(coin, rows.iloc[start:start + BATCH_CHUNK_ROWS], cls_scorer, reg_scorer)
+
+
+def _score_chunk(coin: str, rows: pd.DataFrame, cls_model: Ensemble, reg_model: Ensemble) -> Iterator[Dict[str, Any]]:
+    probas = cls_model.predict_members(np.asarray(feature_matrix(rows, cls_model.feature_cols), dtype=np.float64))
+    preds = reg_model.predict_members(np.asarray(feature_matrix(rows, reg_model.feature_cols), dtype=np.float64))
+    p_mean = probas.mean(axis=1)
+    requested = rows["requested_time"].to_numpy() if "requested_time" in rows.columns else None
+    for i, hour in enumerate(rows["hour"].to_numpy(dtype=np.int64)):
+        p = float(p_mean[i])
+        direction = "positive" if p >= 0.5 else "negative"
+        out: Dict[str, Any] = {
+            "coin": coin,
+            "hour": int(hour),
+            "direction": direction,
+            "prob_positive": p,
+            "prob_std": float(probas[i].std()),
+            "confidence": p if direction == "positive" else 1.0 - p,
+            "pred_next_funding": float(preds[i].mean()),
+            "pred_std": float(preds[i].std()),
+        }
+        if requested is not None:
+            out["requested_time"] = int(requested[i])
+        yield out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a range of hours (or explicit timestamps) and print NDJSON")
+    parser.add_argument("--start", type=int, help="Range start (ms)")
+    parser.add_argument("--end", type=int, help="Range end (ms), default now")
+    parser.add_argument("--timestamps", type=int, nargs="*", help="Explicit timestamps (ms) instead of a range")
+    parser.add_argument("--coins", nargs="*", default=[DEFAULT_COIN])
+    args = parser.parse_args()
+
+    try:
+        batch_span(args.timestamps, args.start, args.end, args.coins)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    for row in predict_batch(args.timestamps, args.start, args.end, args.coins):
+        sys.stdout.write(json.dumps(row) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def wait_until_up(url: str, timeout: float = 60.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not come up within {timeout}s")
+
+
+def hammer(url: str, concurrency: int, duration: float) -> Dict[str, float]:
+    """Keep `concurrency` clients busy on `url` for `duration` seconds."""
+    deadline = time.time() + duration
+
+    def client() -> List[float]:
+        latencies: List[float] = []
+        with requests.Session() as session:
+            while time.time() < deadline:
+                t0 = time.perf_counter()
+                session.get(url, timeout=60)
+                latencies.append(time.perf_counter() - t0)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: client(), range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(x for r in results for x in r)
+    n = len(latencies)
+    return {
+        "requests": n,
+        "req_per_s": n / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": 1000 * latencies[n // 2] if n else float("nan"),
+        "p99_ms": 1000 * latencies[min(n - 1, int(n * 0.99))] if n else float("nan"),
+    }
+
+
+def run_level(workers: int, threads: int, port: int, path: str, concurrency: int, duration: float) -> Dict[str, float]:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads), PORT=str(port), HOST="127.0.0.1")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        wait_until_up(base + "/health")
+        # Warm every worker before measuring
+        hammer(base + path, concurrency, 2.0)
+        stats = hammer(base + path, concurrency, duration)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    return {"workers": workers, "threads": threads, **stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure req/s of the gunicorn deployment as workers scale with cores")
+    # Default to a route with no upstream calls, so the numbers measure serving, not Hyperliquid latency
+    parser.add_argument("--path", default="/dashboard")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--max_workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--concurrency", type=int, default=0, help="Client threads; default 2x workers")
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    levels: List[int] = []
+    w = 1
+    while w < args.max_workers:
+        levels.append(w)
+        w *= 2
+    levels.append(int(args.max_workers))
+
+    results = []
+    for workers in levels:
+        concurrency = args.concurrency or 2 * workers
+        results.append(run_level(workers, args.threads, args.port, args.path, concurrency, args.duration))
+        print(json.dumps(results[-1]), file=sys.stderr)
+
+    base_rps = results[0]["req_per_s"] or float("nan")
+    for r in results:
+        r["speedup"] = r["req_per_s"] / base_rps
+    print(json.dumps({"path": args.path, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Early stopping for the HistGradientBoosting fold models.
+
+sklearn's built-in early stopping scores a shuffled split of the training data, which
+leaks future rows into the holdout. Here the last `holdout_frac` of each fold's (time
+ordered) training slice is the holdout instead: boosting grows `step` iterations at a
+time with `warm_start`, stops once the holdout loss has not improved for `patience`
+steps (or the fold's deadline passes), and the model is then refit on the whole slice
+with the best iteration count so no training rows are lost. Under a deadline the search
+stops early enough to leave time for that refit.
+"""
+import time
+from typing import Any, Callable, Dict, Optional, Union, cast
+
+import numpy as np
+from numpy.typing import NDArray
+from sklearn.base import clone, is_classifier
+from sklearn.ensemble import HistGradientBoostingClassifier, HistGradientBoostingRegressor
+from sklearn.metrics import log_loss, mean_squared_error
+
+
+DEFAULT_HOLDOUT_FRAC = 0.15
+DEFAULT_STEP = 10
+DEFAULT_PATIENCE = 5
+# Never stop before this many iterations; a short, noisy holdout can plateau early
+DEFAULT_MIN_ITER = 50
+
+HGBModel = Union[HistGradientBoostingRegressor, HistGradientBoostingClassifier]
+
+
+def _fresh(model: HGBModel, **params: Any) -> HGBModel:
+    """Unfitted copy of `model` with `params` overridden."""
+    est = cast(HGBModel, clone(model))
+    est.set_params(**params)
+    return est
+
+
+def regression_loss(model: Any, X: NDArray[np.float64], y: NDArray[np.float64], w: Optional[NDArray[np.float64]]) -> float:
+    return float(mean_squared_error(y, model.predict(X), sample_weight=w))
+
+
+def classification_loss(model: Any, X: NDArray[np.float64], y: NDArray[np.int_], w: Optional[NDArray[np.float64]]) -> float:
+    return float(log_loss(y, model.predict_proba(X)[:, 1], sample_weight=w, labels=[0, 1]))
+
+
+def fit_early_stopped(
+    model: HGBModel,
+    X: NDArray[np.float64],
+    y: NDArray[Any],
+    loss_fn: Callable[..., float],
+    sample_weight: Optional[NDArray[np.float64]] = None,
+    deadline: Optional[float] = None,
+    holdout_frac: float = DEFAULT_HOLDOUT_FRAC,
+    step: int = DEFAULT_STEP,
+    patience: int = DEFAULT_PATIENCE,
+    min_iter: int = DEFAULT_MIN_ITER,
+) -> Dict[str, Any]:
+    """
+    Fit `model` (an unfitted HGB estimator whose `max_iter` is the upper bound) on the
+    time-ordered rows of X. `deadline` is a `time.monotonic()` value. Returns the fitted
+    model plus how many iterations were used and why the search stopped.
+    """
+    max_iter = int(model.get_params()["max_iter"])
+    n_fit = int(len(y) * (1.0 - holdout_frac))
+    if is_classifier(model) and len(np.unique(y[n_fit:])) < 2:
+        # A one-class holdout only rewards overconfidence; nothing to stop on
+        if deadline is None:
+            model.set_params(early_stopping=False).fit(X, y, sample_weight=sample_weight)
+            return {"model": model, "n_iter": int(model.n_iter_), "searched_iter": 0, "stopped": "one_class_holdout"}
+        return fit_until(model, X, y, deadline, sample_weight=sample_weight, step=step, reason="one_class_holdout")
+    started = time.monotonic()
+    search = _fresh(model, warm_start=True, early_stopping=False)
+    w_fit = None if sample_weight is None else sample_weight[:n_fit]
+    w_hold = None if sample_weight is None else sample_weight[n_fit:]
+
+    best_loss, best_iter, since_best = np.inf, 0, 0
+    stopped = "max_iter"
+    n_iter = 0
+    sec_per_iter = 0.0
+    while n_iter < max_iter:
+        n_iter = min(n_iter + step, max_iter)
+        search.set_params(max_iter=n_iter)
+        search.fit(X[:n_fit], y[:n_fit], sample_weight=w_fit)
+        loss = loss_fn(search, X[n_fit:], y[n_fit:], w_hold)
+        if loss < best_loss:
+            best_loss, best_iter, since_best = loss, n_iter, 0
+        else:
+            since_best += 1
+        if n_iter >= min_iter and since_best >= patience:
+            stopped = "patience"
+            break
+        if deadline is not None:
+            sec_per_iter = (time.monotonic() - started) / n_iter
+            # Leave room for the next step and for refitting the whole slice at this size
+            refit_sec = sec_per_iter * n_iter / (1.0 - holdout_frac)
+            if time.monotonic() + sec_per_iter * step + refit_sec >= deadline:
+                stopped = "deadline"
+                break
+
+    n_best = max(best_iter, min(min_iter, n_iter))
+    if deadline is not None:
+        # The refit sees 1 / (1 - holdout_frac) times the rows; shrink it to what still fits
+        affordable = int(max(deadline - time.monotonic(), 0.0) * (1.0 - holdout_frac) / max(sec_per_iter, 1e-9))
+        n_best = max(min(n_best, affordable), 1)
+    final = _fresh(model, max_iter=n_best, early_stopping=False)
+    final.fit(X, y, sample_weight=sample_weight)
+    return {"model": final, "n_iter": n_best, "searched_iter": n_iter, "stopped": stopped}
+
+
+def fit_until(
+    model: HGBModel,
+    X: NDArray[np.float64],
+    y: NDArray[Any],
+    deadline: float,
+    sample_weight: Optional[NDArray[np.float64]] = None,
+    step: int = DEFAULT_STEP,
+    reason: str = "max_iter",
+) -> Dict[str, Any]:
+    """
+    Grow `model` on all rows `step` iterations at a time until its `max_iter` or until the
+    next step would overrun `deadline`. `reason` is reported when `max_iter` is reached.
+    """
+    max_iter = int(model.get_params()["max_iter"])
+    started = time.monotonic()
+    grown = _fresh(model, warm_start=True, early_stopping=False)
+    stopped = reason
+    n_iter = 0
+    while n_iter < max_iter:
+        n_iter = min(n_iter + step, max_iter)
+        grown.set_params(max_iter=n_iter)
+        grown.fit(X, y, sample_weight=sample_weight)
+        if n_iter < max_iter and time.monotonic() + (time.monotonic() - started) / n_iter * step >= deadline:
+            stopped = "deadline"
+            break
+    grown.set_params(warm_start=False)
+    return {"model": grown, "n_iter": n_iter, "searched_iter": 0, "stopped": stopped}
+
+
+def fit_without_early_stopping(
+    model: HGBModel,
+    X: NDArray[np.float64],
+    y: NDArray[Any],
+    deadline: Optional[float],
+    sample_weight: Optional[NDArray[np.float64]] = None,
+) -> Dict[str, Any]:
+    """Plain `max_iter` fit (no holdout search); under a deadline it grows with `fit_until`."""
+    if deadline is None:
+        model.fit(X, y, sample_weight=sample_weight)
+        n_iter = int(model.n_iter_)
+        return {"model": model, "n_iter": n_iter, "searched_iter": n_iter, "stopped": "disabled"}
+    return fit_until(model, X, y, deadline, sample_weight=sample_weight, reason="disabled")
+
+
+def fold_deadline(budget_end: Optional[float], folds_left: int) -> Optional[float]:
+    """Split what remains of a global wall-clock budget evenly over the remaining folds."""
+    if budget_end is None:
+        return None
+    now = time.monotonic()
+    return now + max(budget_end - now, 0.0) / max(folds_left, 1)
+
+
+def fold_slice(idx: NDArray[np.int_]) -> slice:
+    """TimeSeriesSplit folds are contiguous; slicing gives views (no copy, mmap-friendly)."""
+    return slice(int(idx[0]), int(idx[-1]) + 1)
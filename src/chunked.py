@@ -0,0 +1,101 @@
+"""
+Out-of-core feature building for training on histories that do not fit in memory.
+
+The merged CSV is streamed in time-ordered chunks. Each chunk is featurized together with
+the last `tail_rows_needed() + 1` raw rows of the previous one, so rolling/lag windows
+see the same history as a full in-memory build (EWM features to within EWM_TOLERANCE).
+The last row of every chunk is held back until the next chunk supplies its next-period
+target. Feature rows go straight into an on-disk `.npy` matrix that training memory-maps,
+so peak feature-build memory is bounded by the chunk size rather than the history length.
+(HistGradientBoosting still copies and bins each fold's training slice in memory.)
+
+    X, y, feature_cols = build_feature_store(csv, out_dir, train_cls.prepare_dataset)
+"""
+import json
+import os
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from .features import build_features, tail_rows_needed
+from .fetch_data import MERGED_READ_DTYPES
+
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+# prepare_dataset(df, dtype, columns) -> (X, y, feature_cols, df_ready) from train/train_cls
+Prepare = Callable[..., Tuple[NDArray[Any], NDArray[Any], List[str], pd.DataFrame]]
+
+
+def count_rows(path: str, block_size: int = 1 << 20) -> int:
+    """Data rows in a CSV (lines after the header), without parsing it."""
+    n = 0
+    with open(path, "rb") as f:
+        last = b"\n"
+        while block := f.read(block_size):
+            n += block.count(b"\n")
+            last = block[-1:]
+    return max(n - 1 + (last != b"\n"), 0)
+
+
+def build_feature_store(
+    merged_csv: str,
+    out_dir: str,
+    prepare: Prepare,
+    columns: Optional[List[str]] = None,
+    dtype: type = np.float64,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Tuple[NDArray[Any], NDArray[Any], List[str]]:
+    """
+    Stream `merged_csv` into `out_dir/X.npy` (+ `y.npy`, `meta.json`) and return the
+    memory-mapped X, y and the feature columns. `prepare` is the task's `prepare_dataset`.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    x_path = os.path.join(out_dir, "X.npy")
+    overlap = tail_rows_needed() + 1
+    # Rows are only ever dropped (NaN warm-up, last row), so the CSV length bounds X
+    capacity = count_rows(merged_csv)
+
+    X_out: Optional[np.memmap] = None
+    y_parts: List[NDArray[Any]] = []
+    feature_cols = list(columns) if columns is not None else None
+    n = 0
+    carry: Optional[pd.DataFrame] = None
+    for chunk in pd.read_csv(merged_csv, dtype=MERGED_READ_DTYPES, chunksize=chunk_rows):
+        frame = chunk if carry is None else pd.concat([carry, chunk], ignore_index=True)
+        # Carried rows were emitted with the previous chunk, except its held-back last row
+        emit_from = 0 if carry is None else len(carry) - 1
+        feat = build_features(frame, columns=feature_cols)
+        X_chunk, y_chunk, cols, _ = prepare(feat.iloc[emit_from:], dtype, feature_cols)
+        if feature_cols is None:
+            feature_cols = cols
+        if X_out is None:
+            X_out = np.lib.format.open_memmap(x_path, mode="w+", dtype=dtype, shape=(capacity, len(feature_cols)))
+        assert X_out is not None
+        X_out[n:n + len(X_chunk)] = X_chunk
+        y_parts.append(y_chunk)
+        n += len(X_chunk)
+        carry = frame.iloc[-overlap:].reset_index(drop=True)
+        del frame, feat, X_chunk
+
+    if X_out is None or feature_cols is None:
+        raise ValueError(f"No rows in {merged_csv}")
+    X_out.flush()
+    del X_out
+    y = np.concatenate(y_parts)
+    np.save(os.path.join(out_dir, "y.npy"), y)
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump({"n_rows": n, "feature_cols": feature_cols, "source": os.path.abspath(merged_csv)}, f, indent=2)
+    return load_feature_store(out_dir)
+
+
+def load_feature_store(out_dir: str) -> Tuple[NDArray[Any], NDArray[Any], List[str]]:
+    """(X memory-mapped read-only, y, feature_cols) as written by `build_feature_store`."""
+    with open(os.path.join(out_dir, "meta.json")) as f:
+        meta = json.load(f)
+    n = int(meta["n_rows"])
+    X = np.load(os.path.join(out_dir, "X.npy"), mmap_mode="r")[:n]
+    y = np.load(os.path.join(out_dir, "y.npy"))
+    return X, y, list(meta["feature_cols"])
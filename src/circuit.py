@@ -0,0 +1,83 @@
+"""
+Circuit breakers for upstream calls.
+
+After `failure_threshold` consecutive failures a breaker opens and callers fail fast with
+CircuitOpenError for `cooldown_sec`, instead of each waiting out its own timeout. The
+first call after the cool-down is let through as a trial: success closes the breaker,
+failure re-opens it for another cool-down. Breakers are process-local and thread-safe.
+"""
+import threading
+import time
+from typing import Any, Dict
+
+from .config import CIRCUIT_COOLDOWN_SEC, CIRCUIT_FAILURE_THRESHOLD
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, cooldown_sec: float = CIRCUIT_COOLDOWN_SEC):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_sec = cooldown_sec
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown_sec:
+                # Let exactly one trial call through
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def check(self) -> None:
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name}: circuit open, skipping upstream call")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {"state": self.state, "failures": self.failures}
+            if self.state == OPEN:
+                out["retry_in_sec"] = max(self.cooldown_sec - (time.monotonic() - self.opened_at), 0.0)
+            return out
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def breaker(name: str) -> CircuitBreaker:
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.snapshot() for b in breakers}
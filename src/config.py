@@ -6,6 +6,34 @@ HL_INFO_URL = "https://api.hyperliquid.xyz/info"
 DEFAULT_COIN = "HYPE"
 DEFAULT_INTERVAL = "1h"
 DEFAULT_HISTORY_DAYS = 180
+# Per-call deadline for each upstream dependency in the async serving path (seconds)
+UPSTREAM_CALL_TIMEOUT_SEC = 10.0
+# Per-component deadlines for /api/summary, measured from the start of the request
+# (seconds). A component that misses its deadline is served from its last good value.
+SUMMARY_DEADLINES_SEC = {
+    "hl_current": 2.0,
+    "hl_pred": 2.0,
+    "dataset": 4.0,
+    "cls": 5.0,
+    "reg": 5.0,
+    "cmp": 4.0,
+    "acc": 5.0,
+}
+# Upstream circuit breakers: open after this many consecutive failures, retry after the cool-down
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_COOLDOWN_SEC = 30.0
+# Largest batch-prediction request: time span covered, explicit timestamps and coins
+BATCH_MAX_SPAN_DAYS = 90
+BATCH_MAX_TIMESTAMPS = 5000
+BATCH_MAX_COINS = 5
+# Rows scored per pass in a batch; batches longer than BATCH_FLAT_MAX_ROWS use the sklearn
+# fold models (faster on many rows) instead of the flat artifact (faster on one row)
+BATCH_CHUNK_ROWS = 256
+BATCH_FLAT_MAX_ROWS = 64
+# Oldest funding history the local store will backfill (days before now)
+FUNDING_STORE_MAX_DAYS = 730
+# Size cap for the on-disk cache of closed historical API windows
+API_CACHE_MAX_BYTES = 256 * 1024 * 1024
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, "data"))
 MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, "models"))
 
@@ -19,6 +47,16 @@ class Paths:
     merged_csv: str = os.path.join(DATA_DIR, "hype_merged.csv")
     model_file: str = os.path.join(MODELS_DIR, "hype_funding_model.pkl")
     model_meta: str = os.path.join(MODELS_DIR, "hype_funding_model_meta.json")
+    model_artifact: str = os.path.join(MODELS_DIR, "hype_funding_model.hfm")
+    feature_selection: str = os.path.join(MODELS_DIR, "feature_selection.json")
     cls_model_file: str = os.path.join(MODELS_DIR, "hype_funding_cls_model.pkl")
     cls_model_meta: str = os.path.join(MODELS_DIR, "hype_funding_cls_model_meta.json")
-    predictions_log: str = os.path.join(DATA_DIR, "predictions_log.csv") 
\ No newline at end of file
+    cls_model_artifact: str = os.path.join(MODELS_DIR, "hype_funding_cls_model.hfm")
+    cls_feature_selection: str = os.path.join(MODELS_DIR, "feature_selection_cls.json")
+    predictions_log: str = os.path.join(DATA_DIR, "predictions_log.csv")
+    monitor_state: str = os.path.join(DATA_DIR, "monitor_state.json")
+    ticks_dir: str = os.path.join(DATA_DIR, "ticks")
+    funding_store_dir: str = os.path.join(DATA_DIR, "funding_store")
+    features_dir: str = os.path.join(DATA_DIR, "features")
+    api_cache_dir: str = os.path.join(DATA_DIR, "cache", "hl_api")
+    profiles_dir: str = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, "profiles"))
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""
+Content-addressed JSON cache on local disk.
+
+Entries are immutable: each key (any JSON-serializable value) maps to
+`<root>/<sha256 of key>.json`, written to a temp file and renamed into place so readers
+never see a partial entry. A hit touches the file's mtime, which makes mtime an LRU
+order; when the directory grows past `max_bytes` the oldest entries are evicted under an
+exclusive lock so concurrent processes do not race on the same files. The directory size
+is tracked incrementally per process and only rescanned every RESCAN_EVERY_PUTS puts (to
+pick up other processes' writes) or when the estimate crosses the cap.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Evict down to this fraction of the cap so every put near the limit does not rescan
+EVICT_TARGET = 0.8
+# Re-measure the directory after this many puts; other processes' writes are not counted
+RESCAN_EVERY_PUTS = 256
+
+
+def cache_key(key: Any) -> str:
+    return hashlib.sha256(json.dumps(key, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class DiskCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._approx_bytes: Optional[int] = None
+        self._puts_since_scan = 0
+        self._size_lock = threading.Lock()
+
+    def _path(self, key: Any) -> str:
+        return os.path.join(self.root, f"{cache_key(key)}.json")
+
+    def get(self, key: Any) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                value = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.warning("Dropping unreadable cache entry %s", path)
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # evicted by another process since the read; the value is still good
+        return value
+
+    def put(self, key: Any, value: Any) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        data = json.dumps(value, separators=(",", ":")).encode()
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            logger.exception("Failed to write cache entry %s", path)
+            self._remove(tmp)
+            return
+        with self._size_lock:
+            if self._approx_bytes is None or self._puts_since_scan >= RESCAN_EVERY_PUTS:
+                self._approx_bytes = self.size_bytes()
+                self._puts_since_scan = 0
+            else:
+                # Overwrites are counted twice; that only makes the next evict() come sooner
+                self._approx_bytes += len(data)
+                self._puts_since_scan += 1
+            over = self._approx_bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def size_bytes(self) -> int:
+        return sum(size for _, _, size in self._entries())
+
+    def evict(self) -> int:
+        """Remove least recently used entries until under the cap. Returns how many were removed."""
+        entries = self._entries()
+        total = sum(size for _, _, size in entries)
+        if total <= self.max_bytes:
+            self._set_size(total)
+            return 0
+        removed = 0
+        with open(os.path.join(self.root, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # Re-scan under the lock: another process may have evicted already
+                entries = sorted(self._entries(), key=lambda e: e[1])
+                total = sum(size for _, _, size in entries)
+                target = self.max_bytes * EVICT_TARGET
+                for path, _, size in entries:
+                    if total <= target:
+                        break
+                    if self._remove(path):
+                        total -= size
+                        removed += 1
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        self._set_size(total)
+        return removed
+
+    def _set_size(self, total: int) -> None:
+        with self._size_lock:
+            self._approx_bytes = total
+            self._puts_since_scan = 0
+
+    def _entries(self) -> list:
+        out = []
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return out
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            out.append((path, st.st_mtime_ns, st.st_size))
+        return out
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
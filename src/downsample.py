@@ -0,0 +1,36 @@
+import numpy as np
+from numpy.typing import NDArray
+
+
+def lttb_indices(x: NDArray[np.floating], y: NDArray[np.floating], n_out: int) -> NDArray[np.int64]:
+    """
+    Largest-Triangle-Three-Buckets (Steinarsson, 2013): indices of `n_out` points that
+    keep the visual shape of the series. First and last points are always kept; every
+    bucket in between contributes the point forming the largest triangle with the point
+    kept from the previous bucket and the mean of the next bucket. NaN y values are never
+    picked unless a bucket holds nothing else.
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n, dtype=np.int64)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=np.int64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # n_out - 2 buckets over the interior points
+    edges = np.floor(np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        if b + 2 < len(edges):
+            nxt_x, nxt_y = x[hi:edges[b + 2]], y[hi:edges[b + 2]]
+            avg_x, avg_y = nxt_x.mean(), np.nanmean(nxt_y) if np.isfinite(nxt_y).any() else y[a]
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        area = np.where(np.isnan(area), -1.0, area)
+        a = lo + int(np.argmax(area))
+        out[b + 1] = a
+    return out
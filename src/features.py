@@ -1,6 +1,64 @@
+import json
+import math
+import os
+
 import pandas as pd
 import numpy as np
-from typing import List, Optional, cast
+from typing import AbstractSet, List, Optional, Tuple, cast
+from numpy.typing import NDArray
+
+from .config import DEFAULT_INTERVAL
+from .utils import HOUR_MS, interval_ms
+
+
+# Longest fixed look-back of any feature: 24-step lags/rolling windows on top of a 1-step diff
+MAX_FEATURE_WINDOW = 25
+# Slowest-decaying recursive smoother: RSI uses alpha = 1/14, the EMAs 2/(span+1) >= 2/25
+EWM_SLOWEST_ALPHA = 1.0 / 14.0
+# Weight the truncated history may still carry in any EWM feature of the last row
+EWM_TOLERANCE = 1e-12
+# Merged-input and target columns that are never model features (train_cls also drops its label)
+FEATURE_DROP_COLS = frozenset({
+    "ts", "i", "s", "n", "o", "h", "l", "hour", "fundingRate", "time", "target_next_funding"
+})
+
+
+def tail_rows_needed(tolerance: float = EWM_TOLERANCE) -> int:
+    """
+    Rows of history needed so the last row's features match the full-history computation.
+    Fixed windows are exact; an adjust=False EWM started W rows late differs by
+    (1 - alpha)^W times its initial error, so W is chosen to push that under `tolerance`.
+    """
+    warmup = math.ceil(math.log(tolerance) / math.log(1.0 - EWM_SLOWEST_ALPHA))
+    return MAX_FEATURE_WINDOW + warmup
+
+
+def load_feature_selection(path: str) -> Optional[List[str]]:
+    """Surviving columns written by `src.prune`, or None when no selection exists."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return list(json.load(f)["features"])
+
+
+def _wants(name: str, wanted: Optional[AbstractSet[str]]) -> bool:
+    return wanted is None or name in wanted
+
+
+def with_candle_times(df: pd.DataFrame) -> pd.DataFrame:
+    """Re-derive candle open/close times dropped by `fetch_data.compact_merged`."""
+    if df.empty or "t" in df.columns or "hour" not in df.columns:
+        return df
+    interval = DEFAULT_INTERVAL
+    if "i" in df.columns and bool(df["i"].notna().any()):
+        interval = str(df["i"].dropna().iloc[0])
+    out = df.copy()
+    # Column names are unique here, so get_loc returns a plain position
+    loc = cast(int, out.columns.get_loc("hour")) + 1
+    hour = cast(pd.Series, out["hour"])
+    out.insert(loc, "t", hour)
+    out.insert(loc + 1, "T", hour + interval_ms(interval) - 1)
+    return out
 
 
 def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
@@ -13,36 +71,49 @@ def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
-def add_cyclical_time_features(df: pd.DataFrame) -> pd.DataFrame:
+def add_cyclical_time_features(df: pd.DataFrame, wanted: Optional[AbstractSet[str]] = None) -> pd.DataFrame:
     if df.empty:
         return df
     out = df.copy()
     two_pi = 2 * np.pi
-    out["hour_sin"] = np.sin(two_pi * out["hour_of_day"].astype(float) / 24.0)
-    out["hour_cos"] = np.cos(two_pi * out["hour_of_day"].astype(float) / 24.0)
-    out["dow_sin"] = np.sin(two_pi * out["day_of_week"].astype(float) / 7.0)
-    out["dow_cos"] = np.cos(two_pi * out["day_of_week"].astype(float) / 7.0)
+    if _wants("hour_sin", wanted):
+        out["hour_sin"] = np.sin(two_pi * out["hour_of_day"].astype(float) / 24.0)
+    if _wants("hour_cos", wanted):
+        out["hour_cos"] = np.cos(two_pi * out["hour_of_day"].astype(float) / 24.0)
+    if _wants("dow_sin", wanted):
+        out["dow_sin"] = np.sin(two_pi * out["day_of_week"].astype(float) / 7.0)
+    if _wants("dow_cos", wanted):
+        out["dow_cos"] = np.cos(two_pi * out["day_of_week"].astype(float) / 7.0)
     return out
 
 
-def add_price_features(df: pd.DataFrame, price_col: str = "c") -> pd.DataFrame:
+def add_price_features(df: pd.DataFrame, price_col: str = "c", wanted: Optional[AbstractSet[str]] = None) -> pd.DataFrame:
     if df.empty:
         return df
     out = df.copy()
     price = cast(pd.Series, out[price_col]).astype(float)
-    out["ret_1"] = price.pct_change(1)
-    out["ret_3"] = price.pct_change(3)
-    out["ret_6"] = price.pct_change(6)
-    out["ret_12"] = price.pct_change(12)
-    out["vol_6"] = price.pct_change().rolling(6).std()
-    out["vol_12"] = price.pct_change().rolling(12).std()
-    out["vol_24"] = price.pct_change().rolling(24).std()
-    out["rsi_14"] = compute_rsi(price, 14)
-    out["z_score_24"] = zscore(price, 24)
+    for k in (1, 3, 6, 12):
+        if _wants(f"ret_{k}", wanted):
+            out[f"ret_{k}"] = price.pct_change(k)
+    vol_windows = [w for w in (6, 12, 24) if _wants(f"vol_{w}", wanted)]
+    if vol_windows:
+        ret = price.pct_change()
+        for w in vol_windows:
+            out[f"vol_{w}"] = ret.rolling(w).std()
+    if _wants("rsi_14", wanted):
+        out["rsi_14"] = compute_rsi(price, 14)
+    if _wants("z_score_24", wanted):
+        out["z_score_24"] = zscore(price, 24)
     return out
 
 
-def add_lags(df: pd.DataFrame, cols: List[str], lags: Optional[List[int]] = None, ema_spans: Optional[List[int]] = None) -> pd.DataFrame:
+def add_lags(
+    df: pd.DataFrame,
+    cols: List[str],
+    lags: Optional[List[int]] = None,
+    ema_spans: Optional[List[int]] = None,
+    wanted: Optional[AbstractSet[str]] = None,
+) -> pd.DataFrame:
     if df.empty:
         return df
     out = df.copy()
@@ -53,22 +124,81 @@ def add_lags(df: pd.DataFrame, cols: List[str], lags: Optional[List[int]] = None
             continue
         series = cast(pd.Series, out[col]).astype(float)
         for k in lag_list:
-            out[f"{col}_lag_{k}"] = series.shift(k)
+            if _wants(f"{col}_lag_{k}", wanted):
+                out[f"{col}_lag_{k}"] = series.shift(k)
         for s in ema_list:
-            out[f"{col}_ema_{s}"] = series.ewm(span=s, adjust=False).mean()
-        out[f"{col}_abs"] = series.abs()
+            if _wants(f"{col}_ema_{s}", wanted):
+                out[f"{col}_ema_{s}"] = series.ewm(span=s, adjust=False).mean()
+        if _wants(f"{col}_abs", wanted):
+            out[f"{col}_abs"] = series.abs()
     return out
 
 
-def add_volume_features(df: pd.DataFrame) -> pd.DataFrame:
+def add_volume_features(df: pd.DataFrame, wanted: Optional[AbstractSet[str]] = None) -> pd.DataFrame:
     if df.empty or "v" not in df.columns:
         return df
     out = df.copy()
     vol = cast(pd.Series, out["v"]).astype(float)
-    out["vol_chg_1"] = vol.pct_change(1)
-    out["vol_chg_6"] = vol.pct_change(6)
-    out["vol_ma_6"] = vol.rolling(6).mean()
-    out["vol_ma_24"] = vol.rolling(24).mean()
+    for k in (1, 6):
+        if _wants(f"vol_chg_{k}", wanted):
+            out[f"vol_chg_{k}"] = vol.pct_change(k)
+    for w in (6, 24):
+        if _wants(f"vol_ma_{w}", wanted):
+            out[f"vol_ma_{w}"] = vol.rolling(w).mean()
+    return out
+
+
+def add_intra_hour_features(
+    df: pd.DataFrame,
+    tick_ts: NDArray[np.int64],
+    tick_premium: NDArray[np.float64],
+    elapsed_ms: int | NDArray[np.int64],
+    last_n: int = 12,
+    wanted: Optional[AbstractSet[str]] = None,
+) -> pd.DataFrame:
+    """
+    Aggregate premium ticks in the first `elapsed_ms` (scalar or per row) of each row's
+    funding hour, i.e. [hour, hour + elapsed_ms): the window that sets the *next* funding,
+    cut at the point a live prediction made `elapsed_ms` into the hour would have reached. Training and
+    serving pass the same offset so both see the same partial-hour prefix, never ticks
+    after it. All rows are done at once with searchsorted + prefix sums over the sorted
+    ticks. Ticks with a missing premium are skipped (and not counted).
+    """
+    names = ["premium_intra_mean", "premium_intra_slope", f"premium_intra_last_{last_n}", "premium_intra_count"]
+    if df.empty or not any(_wants(c, wanted) for c in names):
+        return df
+    out = df.copy()
+    # One NaN in the prefix sums would poison every later hour
+    finite = np.isfinite(tick_premium)
+    tick_ts, tick_premium = tick_ts[finite], tick_premium[finite]
+    hours = out["hour"].to_numpy(dtype=np.int64)
+    lo = np.searchsorted(tick_ts, hours, side="left")
+    hi = np.searchsorted(tick_ts, hours + np.clip(np.asarray(elapsed_ms, dtype=np.int64), 0, HOUR_MS), side="left")
+    n = (hi - lo).astype(float)
+
+    # Hours since the first tick keeps the slope sums well conditioned
+    t = (tick_ts - (tick_ts[0] if len(tick_ts) else 0)) / HOUR_MS
+    p = tick_premium
+
+    def prefix(a: NDArray[np.float64]) -> NDArray[np.float64]:
+        return np.concatenate([[0.0], np.cumsum(a)])
+
+    s_p, s_t, s_tt, s_tp = prefix(p), prefix(t), prefix(t * t), prefix(t * p)
+    sp = s_p[hi] - s_p[lo]
+    st = s_t[hi] - s_t[lo]
+    stt = s_tt[hi] - s_tt[lo]
+    stp = s_tp[hi] - s_tp[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if _wants("premium_intra_mean", wanted):
+            out["premium_intra_mean"] = np.where(n > 0, sp / n, np.nan)
+        if _wants("premium_intra_slope", wanted):
+            denom = n * stt - st * st
+            out["premium_intra_slope"] = np.where((n > 1) & (denom > 0), (n * stp - st * sp) / denom, np.nan)
+        if _wants(f"premium_intra_last_{last_n}", wanted):
+            lo_last = np.maximum(lo, hi - last_n)
+            out[f"premium_intra_last_{last_n}"] = np.where(n > 0, (s_p[hi] - s_p[lo_last]) / (hi - lo_last), np.nan)
+    if _wants("premium_intra_count", wanted):
+        out["premium_intra_count"] = n
     return out
 
 
@@ -89,12 +219,43 @@ def zscore(series: pd.Series, window: int) -> pd.Series:
     return cast(pd.Series, z)
 
 
-def build_features(merged: pd.DataFrame) -> pd.DataFrame:
-    df = merged.copy()
+def build_features(
+    merged: pd.DataFrame,
+    columns: Optional[List[str]] = None,
+    ticks: Optional[Tuple[NDArray[np.int64], NDArray[np.float64]]] = None,
+    intra_hour_elapsed_ms: int | NDArray[np.int64] | None = None,
+) -> pd.DataFrame:
+    """
+    `columns` restricts the derived features to those names (e.g. a model's pruned
+    `feature_cols`); the merged input columns are always kept.
+    `ticks` is an optional time-sorted (ts_ms, premium) pair from `tick_store` (ring buffer
+    or `load_ticks`) and turns on the intra-hour features, off by default. They cover the
+    first `intra_hour_elapsed_ms` of each row's hour; give training the same offset as
+    serving. Rows without ticks get NaN intra-hour features and are dropped downstream.
+    """
+    wanted = None if columns is None else frozenset(columns)
+    df = with_candle_times(merged.copy())
     # Use merged fields: hour, fundingRate, premium, o,h,l,c,v etc.
     df = add_time_features(df)
-    df = add_cyclical_time_features(df)
-    df = add_price_features(df, price_col="c")
-    df = add_lags(df, cols=["fundingRate", "premium"])  # generalized lags and EMAs
-    df = add_volume_features(df)
-    return df 
\ No newline at end of file
+    df = add_cyclical_time_features(df, wanted)
+    df = add_price_features(df, price_col="c", wanted=wanted)
+    df = add_lags(df, cols=["fundingRate", "premium"], wanted=wanted)  # generalized lags and EMAs
+    df = add_volume_features(df, wanted)
+    if ticks is not None:
+        if intra_hour_elapsed_ms is None:
+            raise ValueError("ticks need intra_hour_elapsed_ms: how far into each row's hour the features may look")
+        df = add_intra_hour_features(df, ticks[0], ticks[1], intra_hour_elapsed_ms, wanted=wanted)
+    return df 
+
+
+def numeric_feature_columns(df: pd.DataFrame, drop_cols: AbstractSet[str]) -> List[str]:
+    return [c for c in df.columns if c not in drop_cols and pd.api.types.is_numeric_dtype(df[c])]
+
+
+def feature_matrix(df: pd.DataFrame, feature_cols: List[str], dtype: type = np.float64) -> NDArray[np.floating]:
+    """Fill one preallocated (n_rows, n_features) array column by column, skipping the
+    intermediate float64 frame `df[cols].astype(float).values` would build."""
+    X = np.empty((len(df), len(feature_cols)), dtype=dtype)
+    for j, col in enumerate(feature_cols):
+        X[:, j] = df[col].to_numpy(dtype=dtype, copy=False)
+    return X
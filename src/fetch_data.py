@@ -1,13 +1,19 @@
 import argparse
+import io
 import json
 import os
-from typing import List
+from typing import Any, Dict, Hashable, List, Optional
 
 import pandas as pd
 
 from .config import DEFAULT_COIN, DEFAULT_INTERVAL, DEFAULT_HISTORY_DAYS, Paths
 from .hyperliquid_api import fetch_funding_history, fetch_candles, coin_in_universe
-from .utils import ensure_dir, days_ago_ms, now_ms, floor_hour_ms
+from .profiling import add_profile_arg, profile_run
+from .utils import HOUR_MS, ensure_dir, days_ago_ms, now_ms, interval_ms
+
+
+# Symbols repeat on every row; read them back as categoricals rather than Python strings
+MERGED_READ_DTYPES: Dict[Hashable, Any] = {"coin": "category", "s": "category", "i": "category"}
 
 
 def funding_df(records: List[dict]) -> pd.DataFrame:
@@ -59,7 +65,7 @@ def merge_on_hour(funding: pd.DataFrame, candles: pd.DataFrame) -> pd.DataFrame:
     if funding.empty or candles.empty:
         return pd.DataFrame()
     funding = funding.copy()
-    funding["hour"] = funding["time"].apply(floor_hour_ms)
+    funding["hour"] = funding["time"] // HOUR_MS * HOUR_MS
     candles = candles.copy()
     candles["hour"] = candles["t"]
     merged = pd.merge_asof(
@@ -67,9 +73,62 @@ def merge_on_hour(funding: pd.DataFrame, candles: pd.DataFrame) -> pd.DataFrame:
         candles.sort_values("hour"),
         on="hour",
         direction="backward",
-        tolerance=60 * 60 * 1000,  # within 1h
+        tolerance=HOUR_MS,  # within 1h
     )
-    return merged
+    return compact_merged(merged)
+
+
+def compact_merged(merged: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shrink the merged schema so `hour` is the only timestamp kept per row.
+    `s` duplicates `coin` and `time` is only the funding event's ms jitter past `hour`, so
+    both go; symbols become categoricals. The candle `t`/`T` are dropped when they are
+    exactly `hour` / `hour + interval - 1` on every matched row, and
+    `features.with_candle_times` re-derives them.
+    """
+    if merged.empty:
+        return merged
+    out = merged.drop(columns=[c for c in ("s", "time") if c in merged.columns])
+    for col in ("coin", "i"):
+        if col in out.columns:
+            out[col] = out[col].astype("category")
+    if {"t", "T", "i"}.issubset(out.columns):
+        matched = out["t"].notna()
+        step = out.loc[matched, "i"].astype(str).map(interval_ms)
+        derivable = bool(
+            (out.loc[matched, "t"] == out.loc[matched, "hour"]).all()
+            and (out.loc[matched, "T"] == out.loc[matched, "t"] + step - 1).all()
+        )
+        if derivable:
+            out = out.drop(columns=["t", "T"])
+    return out
+
+
+def read_csv_tail(path: str, n_rows: int, block_size: int = 1 << 16, **read_kwargs: Any) -> pd.DataFrame:
+    """Read the header plus the last `n_rows` rows of a CSV by seeking back from the end."""
+    with open(path, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+        pos = f.seek(0, os.SEEK_END)
+        buf = b""
+        # One extra newline guarantees the first kept line is complete
+        while pos > data_start and buf.count(b"\n") <= n_rows:
+            step = min(block_size, pos - data_start)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    lines = buf.split(b"\n")
+    if pos > data_start:
+        lines = lines[1:]
+    lines = [line for line in lines if line.strip()][-n_rows:]
+    return pd.read_csv(io.BytesIO(header + b"\n".join(lines) + b"\n"), **read_kwargs)
+
+
+def read_merged(path: str, tail_rows: Optional[int] = None) -> pd.DataFrame:
+    """Load the merged CSV (or just its last `tail_rows` rows) with compact dtypes."""
+    if tail_rows is not None:
+        return read_csv_tail(path, tail_rows, dtype=MERGED_READ_DTYPES)
+    return pd.read_csv(path, dtype=MERGED_READ_DTYPES)
 
 
 def main():
@@ -77,37 +136,39 @@ def main():
     parser.add_argument("--coin", default=DEFAULT_COIN)
     parser.add_argument("--interval", default=DEFAULT_INTERVAL)
     parser.add_argument("--days", type=int, default=DEFAULT_HISTORY_DAYS)
+    add_profile_arg(parser)
     args = parser.parse_args()
 
-    paths = Paths()
-    ensure_dir(paths.data_dir)
+    with profile_run("fetch_data", args.profile):
+        paths = Paths()
+        ensure_dir(paths.data_dir)
 
-    if not coin_in_universe(args.coin):
-        raise SystemExit(f"Coin {args.coin} not found in Hyperliquid universe")
+        if not coin_in_universe(args.coin):
+            raise SystemExit(f"Coin {args.coin} not found in Hyperliquid universe")
 
-    end = now_ms()
-    start = days_ago_ms(int(args.days))
+        end = now_ms()
+        start = days_ago_ms(int(args.days))
 
-    fundings = fetch_funding_history(str(args.coin), start, end)
-    fdf = funding_df(fundings)
-    fdf.to_csv(paths.funding_csv, index=False)
+        fundings = fetch_funding_history(str(args.coin), start, end)
+        fdf = funding_df(fundings)
+        fdf.to_csv(paths.funding_csv, index=False)
 
-    candles = fetch_candles(str(args.coin), str(args.interval), start, end)
-    cdf = candles_df(candles)
-    cdf.to_csv(paths.candles_csv, index=False)
+        candles = fetch_candles(str(args.coin), str(args.interval), start, end)
+        cdf = candles_df(candles)
+        cdf.to_csv(paths.candles_csv, index=False)
 
-    merged = merge_on_hour(fdf, cdf)
-    if not merged.empty:
-        merged.to_csv(paths.merged_csv, index=False)
+        merged = merge_on_hour(fdf, cdf)
+        if not merged.empty:
+            merged.to_csv(paths.merged_csv, index=False)
 
-    print(json.dumps({
-        "funding_rows": int(fdf.shape[0]),
-        "candles_rows": int(cdf.shape[0]),
-        "merged_rows": int(merged.shape[0] if not merged.empty else 0),
-        "funding_csv": paths.funding_csv,
-        "candles_csv": paths.candles_csv,
-        "merged_csv": paths.merged_csv,
-    }, indent=2))
+        print(json.dumps({
+            "funding_rows": int(fdf.shape[0]),
+            "candles_rows": int(cdf.shape[0]),
+            "merged_rows": int(merged.shape[0] if not merged.empty else 0),
+            "funding_csv": paths.funding_csv,
+            "candles_csv": paths.candles_csv,
+            "merged_csv": paths.merged_csv,
+        }, indent=2))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,206 @@
+"""
+Local, incrementally synced store of one coin's funding events.
+
+Events live in a flat binary file of FUNDING_DTYPE records sorted by time
+(`data/funding_store/<coin>.bin`). `sync()` only asks the API for what the file does not
+cover yet (older history before the first record, new events after the last), so range
+queries, delta polls and realized-direction lookups are answered locally. Backfill never
+reaches past FUNDING_STORE_MAX_DAYS, and the oldest start already fetched is kept in
+`<coin>.covered`, so a range before the coin's first event is only asked for once.
+"""
+import fcntl
+import os
+import threading
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .config import DEFAULT_COIN, FUNDING_STORE_MAX_DAYS, Paths
+from .fetch_data import funding_df
+from .hyperliquid_api import fetch_funding_history
+from .utils import DAY_MS, HOUR_MS, ensure_dir, now_ms
+
+
+FUNDING_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("fundingRate", "<f8"),
+    ("premium", "<f8"),
+])
+# Do not re-poll for new events more often than this
+MIN_SYNC_INTERVAL_SEC = 30.0
+
+
+def _to_records(records: list) -> NDArray[np.void]:
+    fdf = funding_df(records)
+    out = np.zeros(len(fdf), dtype=FUNDING_DTYPE)
+    if len(fdf):
+        out["time"] = fdf["time"].to_numpy(dtype=np.int64)
+        out["fundingRate"] = fdf["fundingRate"].to_numpy(dtype=np.float64)
+        out["premium"] = fdf["premium"].to_numpy(dtype=np.float64) if "premium" in fdf.columns else np.nan
+    return out
+
+
+class FundingStore:
+    def __init__(self, coin: str = DEFAULT_COIN, store_dir: Optional[str] = None):
+        self.coin = coin
+        self.path = os.path.join(store_dir or Paths().funding_store_dir, f"{coin}.bin")
+        self.covered_path = os.path.join(os.path.dirname(self.path), f"{coin}.covered")
+        self._recs = np.zeros(0, dtype=FUNDING_DTYPE)
+        self._covered: Optional[int] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._last_poll = 0.0
+        self._syncing = 0
+        self._lock = threading.Lock()
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _reload(self) -> None:
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        if stamp is None:
+            self._recs = np.zeros(0, dtype=FUNDING_DTYPE)
+        else:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            self._recs = np.frombuffer(raw[: len(raw) - len(raw) % FUNDING_DTYPE.itemsize], dtype=FUNDING_DTYPE)
+        self._stamp = stamp
+
+    def records(self) -> NDArray[np.void]:
+        with self._lock:
+            self._reload()
+            return self._recs
+
+    def _read_covered(self) -> Optional[int]:
+        try:
+            with open(self.covered_path) as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_covered(self, start_ms: int) -> None:
+        tmp = f"{self.covered_path}.tmp.{os.getpid()}"
+        with open(tmp, "w") as f:
+            f.write(str(int(start_ms)))
+        os.replace(tmp, self.covered_path)
+        self._covered = int(start_ms)
+
+    def covered_from(self) -> Optional[int]:
+        """Oldest time the store is known complete from (fetched, even if nothing was there)."""
+        first = int(self._recs["time"][0]) if len(self._recs) else None
+        known = [t for t in (first, self._covered) if t is not None]
+        return min(known) if known else None
+
+    @staticmethod
+    def floor_ms() -> int:
+        return now_ms() - FUNDING_STORE_MAX_DAYS * DAY_MS
+
+    def _missing_old(self, start_ms: int) -> bool:
+        covered = self.covered_from()
+        return covered is None or start_ms < covered - HOUR_MS
+
+    def sync(self, start_ms: int, force: bool = False) -> NDArray[np.void]:
+        """
+        Make the store cover [start_ms, now] (start clamped to `floor_ms()`) and return all
+        records. The in-process lock only guards the in-memory state; upstream fetches run
+        outside it (under the cross-process file lock), so readers never queue behind a slow
+        sync. A routine poll is skipped while another thread of this process is syncing.
+        """
+        start_ms = max(int(start_ms), self.floor_ms())
+        with self._lock:
+            self._reload()
+            if self._covered is None:
+                self._covered = self._read_covered()
+            missing_old = self._missing_old(start_ms)
+            poll_due = force or time.monotonic() - self._last_poll >= MIN_SYNC_INTERVAL_SEC
+            if not missing_old and (not poll_due or self._syncing):
+                return self._recs
+            self._syncing += 1
+        try:
+            ensure_dir(os.path.dirname(self.path))
+            with open(f"{self.path}.lock", "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    with self._lock:
+                        # Another process (or thread) may have synced while we waited for the lock
+                        self._reload()
+                        self._covered = self._read_covered()
+                        recs, covered = self._recs, self.covered_from()
+                        fetch_old = self._missing_old(start_ms)
+                    older, newer = self._fetch(start_ms, recs, covered, fetch_old)
+                    with self._lock:
+                        self._apply(start_ms, recs, covered, fetch_old, older, newer)
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+            with self._lock:
+                self._last_poll = time.monotonic()
+        finally:
+            with self._lock:
+                self._syncing -= 1
+        return self._recs
+
+    def _fetch(
+        self, start_ms: int, recs: NDArray[np.void], covered: Optional[int], fetch_old: bool
+    ) -> Tuple[Optional[NDArray[np.void]], NDArray[np.void]]:
+        """Upstream events the store lacks: (older than it covers or None, newer than its last)."""
+        if len(recs) == 0:
+            return None, _to_records(fetch_funding_history(self.coin, start_ms, now_ms()))
+        first, last = int(recs["time"][0]), int(recs["time"][-1])
+        older = _to_records(fetch_funding_history(self.coin, start_ms, int(covered or first) - 1)) if fetch_old else None
+        newer = _to_records(fetch_funding_history(self.coin, last + 1, now_ms()))
+        return older, newer[newer["time"] > last]
+
+    def _apply(
+        self,
+        start_ms: int,
+        recs: NDArray[np.void],
+        covered: Optional[int],
+        fetch_old: bool,
+        older: Optional[NDArray[np.void]],
+        newer: NDArray[np.void],
+    ) -> None:
+        if len(recs) == 0:
+            self._write(newer)
+            self._write_covered(start_ms if covered is None else min(start_ms, covered))
+            return
+        first = int(recs["time"][0])
+        if older is not None and len(older):
+            self._write(np.concatenate([older[older["time"] < first], recs, newer]))
+        elif len(newer):
+            # Pure append; readers tolerate a partially written trailing record
+            with open(self.path, "ab") as f:
+                newer.tofile(f)
+            self._stamp = None
+            self._reload()
+        if fetch_old:
+            # Recorded even when the range held no events, so it is not asked for again
+            self._write_covered(start_ms)
+
+    def _write(self, recs: NDArray[np.void]) -> None:
+        tmp = f"{self.path}.tmp.{os.getpid()}"
+        recs.tofile(tmp)
+        os.replace(tmp, self.path)
+        self._stamp = None
+        self._reload()
+
+
+def realized_after(recs: NDArray[np.void], times_ms: NDArray[np.int64]) -> Tuple[NDArray[np.int64], NDArray[np.float64]]:
+    """
+    For each time, the first funding event strictly after it: (event time, rate), with
+    -1 / NaN where no such event is stored yet.
+    """
+    valid = recs[~np.isnan(recs["fundingRate"])]
+    pos = np.searchsorted(valid["time"], times_ms, side="right")
+    found = pos < len(valid)
+    ev_time = np.full(len(times_ms), -1, dtype=np.int64)
+    ev_rate = np.full(len(times_ms), np.nan, dtype=np.float64)
+    ev_time[found] = valid["time"][pos[found]]
+    ev_rate[found] = valid["fundingRate"][pos[found]]
+    return ev_time, ev_rate
@@ -1,19 +1,88 @@
+import os
 import time
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import requests
 
-from .config import HL_INFO_URL
+from .circuit import CircuitOpenError, breaker
+from .config import API_CACHE_MAX_BYTES, HL_INFO_URL, Paths
+from .disk_cache import DiskCache
+from .utils import interval_ms, now_ms
 
 
 logger = logging.getLogger(__name__)
 
+# Closed history is cached in aligned blocks: 20 days of hourly funding fits one page,
+# and 4000 candles stay under candleSnapshot's 5000 cap
+FUNDING_BLOCK_MS = 20 * 24 * 60 * 60 * 1000
+CANDLE_BLOCK_CANDLES = 4000
+# A block counts as closed this long after its end, leaving room for late prints
+CLOSE_MARGIN_MS = 10 * 60 * 1000
+
+_api_cache: Optional[DiskCache] = None
+
+
+def api_cache() -> Optional[DiskCache]:
+    """Shared cache of closed windows; HL_API_CACHE=0 disables it."""
+    global _api_cache
+    if os.environ.get("HL_API_CACHE", "1") == "0":
+        return None
+    if _api_cache is None:
+        _api_cache = DiskCache(Paths().api_cache_dir, API_CACHE_MAX_BYTES)
+    return _api_cache
+
+
+def closed_blocks(start_ms: int, end_ms: int, block_ms: int, now: int) -> Tuple[List[int], Optional[int]]:
+    """
+    Split [start_ms, end_ms] into block-aligned windows that have fully closed (served from
+    the cache) and the start of the still-open tail that must hit the network (None if the
+    whole range is closed).
+    """
+    blocks: List[int] = []
+    b = start_ms // block_ms * block_ms
+    while b <= end_ms and b + block_ms + CLOSE_MARGIN_MS <= now:
+        blocks.append(b)
+        b += block_ms
+    return blocks, (max(b, start_ms) if b <= end_ms else None)
+
+
+def funding_block_key(coin: str, block_start: int) -> Dict[str, Any]:
+    return {"endpoint": "fundingHistory", "coin": coin, "start": block_start, "end": block_start + FUNDING_BLOCK_MS - 1}
+
+
+def candle_block_ms(interval: str) -> int:
+    return CANDLE_BLOCK_CANDLES * interval_ms(interval)
+
+
+def candle_block_key(coin: str, interval: str, block_start: int) -> Dict[str, Any]:
+    return {
+        "endpoint": "candleSnapshot", "coin": coin, "interval": interval,
+        "start": block_start, "end": block_start + candle_block_ms(interval) - 1,
+    }
+
+
+def in_range(records: List[Dict[str, Any]], field: str, start_ms: int, end_ms: int) -> List[Dict[str, Any]]:
+    return [r for r in records if start_ms <= int(r.get(field, 0)) <= end_ms]
+
+
+def upstream_breaker(body: Dict[str, Any]):
+    """One breaker per info request type, shared by the sync and async clients."""
+    return breaker(f"hl:{body.get('type')}")
+
 
 def _post_info(body: Dict[str, Any], timeout: int = 20) -> Any:
+    circuit = upstream_breaker(body)
+    circuit.check()
     headers = {"Content-Type": "application/json"}
-    response = requests.post(HL_INFO_URL, json=body, headers=headers, timeout=timeout)
-    response.raise_for_status()
-    return response.json()
+    try:
+        response = requests.post(HL_INFO_URL, json=body, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+    except Exception:
+        circuit.record_failure()
+        raise
+    circuit.record_success()
+    return data
 
 
 def get_meta_and_asset_ctxs() -> Any:
@@ -27,6 +96,9 @@ def get_meta() -> Any:
 def coin_in_universe(coin: str) -> bool:
     try:
         meta = get_meta()
+    except CircuitOpenError as exc:
+        logger.warning("%s", exc)
+        return False
     except Exception:
         logger.exception("Failed to fetch meta")
         return False
@@ -39,6 +111,38 @@ def fetch_funding_history(
     start_time_ms: int,
     end_time_ms: Optional[int] = None,
     max_pages: int = 1000,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Funding events in [start, end]. Closed 20-day blocks come from the disk cache (fetched
+    whole on a miss); only the open tail goes to the network.
+    """
+    cache = api_cache() if use_cache else None
+    if cache is None:
+        return _fetch_funding_pages(coin, start_time_ms, end_time_ms, max_pages)
+    end = end_time_ms if end_time_ms is not None else now_ms()
+    blocks, tail_start = closed_blocks(start_time_ms, end, FUNDING_BLOCK_MS, now_ms())
+    results: List[Dict[str, Any]] = []
+    for b in blocks:
+        key = funding_block_key(coin, b)
+        block = cache.get(key)
+        if not block:
+            block = _fetch_funding_pages(coin, b, key["end"], max_pages)
+            # An empty answer may be a one-off upstream glitch; never pin it as closed (and refetch
+            # empty entries written before this rule)
+            if block:
+                cache.put(key, block)
+        results.extend(in_range(block, "time", start_time_ms, end))
+    if tail_start is not None:
+        results.extend(_fetch_funding_pages(coin, tail_start, end_time_ms, max_pages))
+    return results
+
+
+def _fetch_funding_pages(
+    coin: str,
+    start_time_ms: int,
+    end_time_ms: Optional[int] = None,
+    max_pages: int = 1000,
 ) -> List[Dict[str, Any]]:
     """
     Paginates funding history (cap ~500 per response). Use last timestamp+1 as next start.
@@ -74,18 +178,48 @@ def fetch_predicted_fundings() -> Any:
     return _post_info({"type": "predictedFundings"})
 
 
+def extract_predicted_funding(data: Any, coin: str, venue: str = "HlPerp") -> Optional[Dict[str, Any]]:
+    """Pick the (coin, venue) entry out of a predictedFundings response."""
+    for entry in data or []:
+        if not isinstance(entry, list) or len(entry) != 2:
+            continue
+        c, venues = entry
+        if c == coin:
+            for v in venues:
+                if isinstance(v, list) and len(v) == 2 and v[0] == venue:
+                    return v[1]
+    return None
+
+
+def extract_current_funding(meta_and_ctxs: Any, coin: str) -> Optional[Dict[str, Any]]:
+    """Pick the coin's asset context out of a metaAndAssetCtxs response."""
+    meta, ctxs = meta_and_ctxs
+    universe = meta.get("universe", [])
+    for idx, u in enumerate(universe):
+        if u.get("name") == coin:
+            if idx < len(ctxs):
+                ctx = ctxs[idx]
+                # Normalize numeric fields to floats when possible
+                out: Dict[str, Any] = {}
+                for k in ["funding", "premium", "markPx", "oraclePx", "openInterest"]:
+                    v = ctx.get(k)
+                    if v is None:
+                        continue
+                    try:
+                        out[k] = float(v)
+                    except Exception:
+                        out[k] = v
+                return out
+            break
+    return None
+
+
 def get_predicted_funding_for_coin(coin: str, venue: str = "HlPerp") -> Optional[Dict[str, Any]]:
     """Return predicted funding payload for a coin at a given venue, if available."""
     try:
-        data = fetch_predicted_fundings()
-        for entry in data:
-            if not isinstance(entry, list) or len(entry) != 2:
-                continue
-            c, venues = entry
-            if c == coin:
-                for v in venues:
-                    if isinstance(v, list) and len(v) == 2 and v[0] == venue:
-                        return v[1]
+        return extract_predicted_funding(fetch_predicted_fundings(), coin, venue)
+    except CircuitOpenError as exc:
+        logger.warning("%s", exc)
     except Exception:
         logger.exception("Failed to fetch predicted fundings")
     return None
@@ -97,41 +231,62 @@ def get_current_funding_for_coin(coin: str) -> Optional[Dict[str, Any]]:
     Example keys in result: funding, premium, markPx, oraclePx, openInterest.
     """
     try:
-        meta, ctxs = get_meta_and_asset_ctxs()
-        universe = meta.get("universe", [])
-        for idx, u in enumerate(universe):
-            if u.get("name") == coin:
-                if idx < len(ctxs):
-                    ctx = ctxs[idx]
-                    # Normalize numeric fields to floats when possible
-                    out: Dict[str, Any] = {}
-                    for k in ["funding", "premium", "markPx", "oraclePx", "openInterest"]:
-                        v = ctx.get(k)
-                        if v is None:
-                            continue
-                        try:
-                            out[k] = float(v)
-                        except Exception:
-                            out[k] = v
-                    return out
-                break
+        return extract_current_funding(get_meta_and_asset_ctxs(), coin)
+    except CircuitOpenError as exc:
+        logger.warning("%s", exc)
     except Exception:
         logger.exception("Failed to fetch current funding context")
     return None
 
 
-def fetch_candles(
+def candle_request_body(
     coin: str,
     interval: str,
     start_time_ms: int,
     end_time_ms: Optional[int] = None,
-) -> List[Dict[str, Any]]:
+) -> Dict[str, Any]:
     body: Dict[str, Any] = {
         "type": "candleSnapshot",
         "req": {"coin": coin, "interval": interval, "startTime": int(start_time_ms)},
     }
     if end_time_ms is not None:
         body["req"]["endTime"] = int(end_time_ms)
-    data = _post_info(body)
+    return body
+
+
+def fetch_candles(
+    coin: str,
+    interval: str,
+    start_time_ms: int,
+    end_time_ms: Optional[int] = None,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """Candles opened in [start, end]; closed blocks of 4000 candles come from the disk cache."""
+    cache = api_cache() if use_cache else None
+    if cache is None:
+        return _fetch_candles_raw(coin, interval, start_time_ms, end_time_ms)
+    end = end_time_ms if end_time_ms is not None else now_ms()
+    blocks, tail_start = closed_blocks(start_time_ms, end, candle_block_ms(interval), now_ms())
+    results: List[Dict[str, Any]] = []
+    for b in blocks:
+        key = candle_block_key(coin, interval, b)
+        block = cache.get(key)
+        if not block:
+            block = _fetch_candles_raw(coin, interval, b, key["end"])
+            if block:
+                cache.put(key, block)
+        results.extend(in_range(block, "t", start_time_ms, end))
+    if tail_start is not None:
+        results.extend(_fetch_candles_raw(coin, interval, tail_start, end_time_ms))
+    return results
+
+
+def _fetch_candles_raw(
+    coin: str,
+    interval: str,
+    start_time_ms: int,
+    end_time_ms: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    data = _post_info(candle_request_body(coin, interval, start_time_ms, end_time_ms))
     # Normalize fields we use: t (open time), T (close time), c (close), o (open), h (high), l (low), v (volume)
-    return data or [] 
\ No newline at end of file
+    return data or []
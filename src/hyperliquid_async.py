@@ -0,0 +1,177 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Any
+
+import aiohttp
+
+from .config import HL_INFO_URL
+from .circuit import CircuitOpenError
+from .hyperliquid_api import (
+    FUNDING_BLOCK_MS,
+    api_cache,
+    candle_block_key,
+    candle_block_ms,
+    candle_request_body,
+    closed_blocks,
+    extract_current_funding,
+    extract_predicted_funding,
+    funding_block_key,
+    in_range,
+    upstream_breaker,
+)
+from .utils import now_ms
+
+
+logger = logging.getLogger(__name__)
+
+
+async def _post_info(session: aiohttp.ClientSession, body: Dict[str, Any], timeout: float = 20) -> Any:
+    circuit = upstream_breaker(body)
+    circuit.check()
+    headers = {"Content-Type": "application/json"}
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    try:
+        async with session.post(HL_INFO_URL, json=body, headers=headers, timeout=client_timeout) as response:
+            response.raise_for_status()
+            data = await response.json(content_type=None)
+    except (Exception, asyncio.CancelledError):
+        # Cancellation here means a caller's deadline ran out on a slow upstream
+        circuit.record_failure()
+        raise
+    circuit.record_success()
+    return data
+
+
+async def get_meta_and_asset_ctxs(session: aiohttp.ClientSession) -> Any:
+    return await _post_info(session, {"type": "metaAndAssetCtxs"})
+
+
+async def fetch_predicted_fundings(session: aiohttp.ClientSession) -> Any:
+    return await _post_info(session, {"type": "predictedFundings"})
+
+
+async def get_predicted_funding_for_coin(
+    session: aiohttp.ClientSession, coin: str, venue: str = "HlPerp"
+) -> Optional[Dict[str, Any]]:
+    """Async twin of `hyperliquid_api.get_predicted_funding_for_coin`."""
+    try:
+        return extract_predicted_funding(await fetch_predicted_fundings(session), coin, venue)
+    except CircuitOpenError as exc:
+        logger.warning("%s", exc)
+    except Exception:
+        logger.exception("Failed to fetch predicted fundings")
+    return None
+
+
+async def get_current_funding_for_coin(session: aiohttp.ClientSession, coin: str) -> Optional[Dict[str, Any]]:
+    """Async twin of `hyperliquid_api.get_current_funding_for_coin`."""
+    try:
+        return extract_current_funding(await get_meta_and_asset_ctxs(session), coin)
+    except CircuitOpenError as exc:
+        logger.warning("%s", exc)
+    except Exception:
+        logger.exception("Failed to fetch current funding context")
+    return None
+
+
+async def fetch_funding_history(
+    session: aiohttp.ClientSession,
+    coin: str,
+    start_time_ms: int,
+    end_time_ms: Optional[int] = None,
+    max_pages: int = 1000,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """Async twin of `hyperliquid_api.fetch_funding_history`, sharing its disk cache."""
+    cache = api_cache() if use_cache else None
+    if cache is None:
+        return await _fetch_funding_pages(session, coin, start_time_ms, end_time_ms, max_pages)
+    end = end_time_ms if end_time_ms is not None else now_ms()
+    blocks, tail_start = closed_blocks(start_time_ms, end, FUNDING_BLOCK_MS, now_ms())
+    results: List[Dict[str, Any]] = []
+    for b in blocks:
+        key = funding_block_key(coin, b)
+        # Small local file reads/writes; a thread hop via the default executor would be
+        # joined by asyncio.run() and could hold a request past its deadlines
+        block = cache.get(key)
+        if not block:
+            block = await _fetch_funding_pages(session, coin, b, key["end"], max_pages)
+            # An empty answer may be a one-off upstream glitch; never pin it as closed (and refetch
+            # empty entries written before this rule)
+            if block:
+                cache.put(key, block)
+        results.extend(in_range(block, "time", start_time_ms, end))
+    if tail_start is not None:
+        results.extend(await _fetch_funding_pages(session, coin, tail_start, end_time_ms, max_pages))
+    return results
+
+
+async def _fetch_funding_pages(
+    session: aiohttp.ClientSession,
+    coin: str,
+    start_time_ms: int,
+    end_time_ms: Optional[int] = None,
+    max_pages: int = 1000,
+) -> List[Dict[str, Any]]:
+    """
+    Same pagination as the sync client. Pages depend on each other, so they stay sequential.
+    """
+    results: List[Dict[str, Any]] = []
+    current_start = start_time_ms
+    effective_end = end_time_ms
+    for _ in range(max_pages):
+        body = {"type": "fundingHistory", "coin": coin, "startTime": int(current_start)}
+        if effective_end is not None:
+            body["endTime"] = int(effective_end)
+        page = await _post_info(session, body)
+        if not page:
+            break
+        page_sorted = sorted(page, key=lambda x: x.get("time", 0))
+        results.extend(page_sorted)
+        last_time = page_sorted[-1].get("time", current_start)
+        if last_time <= current_start:
+            break
+        current_start = int(last_time) + 1
+        if effective_end is not None and current_start > effective_end:
+            break
+        await asyncio.sleep(0.05)
+    return results
+
+
+async def fetch_candles(
+    session: aiohttp.ClientSession,
+    coin: str,
+    interval: str,
+    start_time_ms: int,
+    end_time_ms: Optional[int] = None,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """Async twin of `hyperliquid_api.fetch_candles`, sharing its disk cache."""
+    cache = api_cache() if use_cache else None
+    if cache is None:
+        return await _fetch_candles_raw(session, coin, interval, start_time_ms, end_time_ms)
+    end = end_time_ms if end_time_ms is not None else now_ms()
+    blocks, tail_start = closed_blocks(start_time_ms, end, candle_block_ms(interval), now_ms())
+    results: List[Dict[str, Any]] = []
+    for b in blocks:
+        key = candle_block_key(coin, interval, b)
+        block = cache.get(key)  # synchronous on purpose, see fetch_funding_history
+        if not block:
+            block = await _fetch_candles_raw(session, coin, interval, b, key["end"])
+            if block:
+                cache.put(key, block)
+        results.extend(in_range(block, "t", start_time_ms, end))
+    if tail_start is not None:
+        results.extend(await _fetch_candles_raw(session, coin, interval, tail_start, end_time_ms))
+    return results
+
+
+async def _fetch_candles_raw(
+    session: aiohttp.ClientSession,
+    coin: str,
+    interval: str,
+    start_time_ms: int,
+    end_time_ms: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    data = await _post_info(session, candle_request_body(coin, interval, start_time_ms, end_time_ms))
+    return data or []
@@ -2,46 +2,55 @@ import argparse
 import json
 import os
 
-import joblib
 import numpy as np
-import pandas as pd
 
+from .artifact import KIND_REGRESSOR, artifact_for, load_ensemble
 from .config import Paths
-from .features import build_features
+from .features import EWM_TOLERANCE, build_features, tail_rows_needed
+from .fetch_data import read_merged
+from .profiling import add_profile_arg, profile_run
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--merged_csv", default=Paths().merged_csv)
     parser.add_argument("--model_file", default=Paths().model_file)
+    parser.add_argument("--artifact", default=None, help="Flat artifact (default: --model_file with an .hfm suffix)")
+    parser.add_argument("--tail_rows", type=int, default=tail_rows_needed(),
+                        help=f"Trailing rows to load (default keeps EWM features within {EWM_TOLERANCE:g} of full history)")
+    parser.add_argument("--full_history", action="store_true", help="Load the whole merged CSV instead of the tail")
+    add_profile_arg(parser)
     args = parser.parse_args()
 
-    if not os.path.exists(args.merged_csv):
-        raise SystemExit(f"Merged CSV not found at {args.merged_csv}.")
-    if not os.path.exists(args.model_file):
-        raise SystemExit(f"Model file not found at {args.model_file}.")
-
-    df = pd.read_csv(args.merged_csv)
-    df_feat = build_features(df)
-
-    payload = joblib.load(args.model_file)
-    models = payload["models"]
-    feature_cols = payload["feature_cols"]
-
-    # Prepare feature row(s)
-    df_ready = df_feat.copy()
-    # Drop rows with nas introduced by rolling windows
-    df_ready = df_ready.dropna().reset_index(drop=True)
-    if df_ready.empty:
-        raise SystemExit("Not enough data for inference")
-
-    x_row = df_ready[feature_cols].astype(float).values[-1:]
-
-    preds = np.array([m.predict(x_row)[0] for m in models])
-    pred_mean = float(np.mean(preds))
-    pred_std = float(np.std(preds))
-
-    print(json.dumps({"pred_next_funding": pred_mean, "pred_std": pred_std, "n_models": len(models)}, indent=2))
+    with profile_run("infer", args.profile):
+        if not os.path.exists(args.merged_csv):
+            raise SystemExit(f"Merged CSV not found at {args.merged_csv}.")
+        # The artifact follows --model_file, so a default .hfm never shadows an explicit pickle
+        artifact = args.artifact or artifact_for(args.model_file)
+        if not os.path.exists(artifact) and not os.path.exists(args.model_file):
+            raise SystemExit(f"Model file not found at {args.model_file}.")
+
+        # Only the last row is scored, so cost stays flat as the merged history grows
+        df = read_merged(args.merged_csv, tail_rows=None if args.full_history else args.tail_rows)
+        ensemble = load_ensemble(artifact, args.model_file, KIND_REGRESSOR)
+        feature_cols = ensemble.feature_cols
+        # Only compute the columns this model was trained on
+        df_feat = build_features(df, columns=feature_cols)
+
+        # Prepare feature row(s)
+        df_ready = df_feat.copy()
+        # Drop rows with nas introduced by rolling windows
+        df_ready = df_ready.dropna().reset_index(drop=True)
+        if df_ready.empty:
+            raise SystemExit("Not enough data for inference")
+
+        x_row = df_ready[feature_cols].to_numpy(dtype=np.float64)[-1:]
+
+        preds = ensemble.predict_members(x_row)[0]
+        pred_mean = float(np.mean(preds))
+        pred_std = float(np.std(preds))
+
+        print(json.dumps({"pred_next_funding": pred_mean, "pred_std": pred_std, "n_models": ensemble.n_models}, indent=2))
 
 
 if __name__ == "__main__":
@@ -1,9 +1,15 @@
+import argparse
 import json
+import os
 from datetime import datetime, timezone
 
+import pandas as pd
 
-from .config import DEFAULT_COIN, DEFAULT_INTERVAL
+from .config import DEFAULT_COIN, DEFAULT_INTERVAL, Paths
 from .hyperliquid_api import get_predicted_funding_for_coin, get_current_funding_for_coin
+from .monitor import SharedMonitor
+from .profiling import add_profile_arg, profile_run
+from .utils import now_ms
 import subprocess
 import sys
 
@@ -18,14 +24,30 @@ def run_cmd(args):
     return proc.stdout
 
 
-def once(coin: str = DEFAULT_COIN, interval: str = DEFAULT_INTERVAL):
+def once(coin: str = DEFAULT_COIN, interval: str = DEFAULT_INTERVAL, retrain: str = "always", profile: bool = False):
+    paths = Paths()
+    # Child steps write their own profiles
+    profile_flag = ["--profile"] if profile else []
+    monitor = SharedMonitor(paths.monitor_state, paths.predictions_log)
+
     # Fetch latest data window (uses default days from fetch_data)
-    run_cmd([PYTHON, "-m", "src.fetch_data", "--coin", coin, "--interval", interval])
-    # Train cls (could be scheduled less frequently; here for simplicity)
-    run_cmd([PYTHON, "-m", "src.train_cls"])
+    run_cmd([PYTHON, "-m", "src.fetch_data", "--coin", coin, "--interval", interval] + profile_flag)
+
+    # Score earlier predictions against the funding events just fetched
+    fdf = pd.read_csv(paths.funding_csv)
+    with monitor.update() as mon:
+        mon.resolve(fdf["time"].astype("int64"), fdf["fundingRate"].astype(float))
+        degraded = mon.degraded(now_ms())
+
+    # Train cls every cycle, or only when the rolling metrics degrade
+    model_missing = not (os.path.exists(paths.cls_model_artifact) or os.path.exists(paths.cls_model_file))
+    retrained = retrain == "always" or bool(degraded) or model_missing
+    if retrained:
+        run_cmd([PYTHON, "-m", "src.train_cls"] + profile_flag)
     # Infer
-    out = run_cmd([PYTHON, "-m", "src.infer_cls"])
+    out = run_cmd([PYTHON, "-m", "src.infer_cls"] + profile_flag)
     infer = json.loads(out)
+    monitor.log_prediction(now_ms(), str(infer["direction"]), float(infer["prob_positive"]))
 
     # HL predicted and current funding
     hl_pred = get_predicted_funding_for_coin(coin)
@@ -40,20 +62,31 @@ def once(coin: str = DEFAULT_COIN, interval: str = DEFAULT_INTERVAL):
         "n_models": infer.get("n_models"),
         "hl_predicted_funding": hl_pred,  # includes fundingRate and nextFundingTime
         "hl_current_ctx": hl_current,      # includes current funding and premium
+        "retrained": retrained,
+        "degraded": degraded,
     }
     print(json.dumps(payload, indent=2))
 
 
 def main():
-    # Run once. For continuous hourly loop, you can uncomment below.
-    once()
-    # while True:
-    #     now = now_ms()
-    #     # Sleep until next hour boundary
-    #     sleep_sec = 3600 - (now // 1000) % 3600
-    #     time.sleep(sleep_sec + 1)
-    #     once()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--coin", default=DEFAULT_COIN)
+    parser.add_argument("--interval", default=DEFAULT_INTERVAL)
+    parser.add_argument("--retrain", choices=["always", "on_degrade"], default="always",
+                        help="on_degrade retrains only when the rolling accuracy/Brier monitor flags degradation")
+    add_profile_arg(parser)
+    args = parser.parse_args()
+
+    with profile_run("live_loop", args.profile):
+        # Run once. For continuous hourly loop, you can uncomment below.
+        once(args.coin, args.interval, args.retrain, args.profile)
+        # while True:
+        #     now = now_ms()
+        #     # Sleep until next hour boundary
+        #     sleep_sec = 3600 - (now // 1000) % 3600
+        #     time.sleep(sleep_sec + 1)
+        #     once()
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import tracemalloc
+import warnings
+from typing import Any, Callable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import Paths
+from .features import FEATURE_DROP_COLS, build_features, feature_matrix, numeric_feature_columns
+from .fetch_data import compact_merged, read_merged
+
+
+def bytes_per_row(df: pd.DataFrame) -> float:
+    return float(df.memory_usage(deep=True, index=False).sum()) / max(len(df), 1)
+
+
+def traced_peak(fn: Callable[[], Any]) -> Tuple[Any, int]:
+    """Run `fn` and return its result with the peak bytes allocated while it ran."""
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes per row of the merged dataset and feature matrix, before and after compaction")
+    parser.add_argument("--merged_csv", default=Paths().merged_csv)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.merged_csv):
+        raise SystemExit(f"Merged CSV not found at {args.merged_csv}. Run fetch_data.py first.")
+
+    raw = pd.read_csv(args.merged_csv)
+    compact = compact_merged(read_merged(args.merged_csv))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        feat = build_features(compact).dropna().reset_index(drop=True)
+    feature_cols = numeric_feature_columns(feat, FEATURE_DROP_COLS)
+    _, peak_legacy = traced_peak(lambda: np.asarray(feat[feature_cols].astype(float).values, dtype=np.float64))
+    X64, peak64 = traced_peak(lambda: feature_matrix(feat, feature_cols, np.float64))
+    X32, peak32 = traced_peak(lambda: feature_matrix(feat, feature_cols, np.float32))
+    n_feat_rows = max(len(feat), 1)
+
+    print(json.dumps({
+        "rows": int(raw.shape[0]),
+        "merged_bytes_per_row": {
+            "raw": bytes_per_row(raw),
+            "compact": bytes_per_row(compact),
+            "columns_raw": list(raw.columns),
+            "columns_compact": list(compact.columns),
+        },
+        "feature_matrix_bytes_per_row": {
+            "n_features": len(feature_cols),
+            "float64": X64.nbytes / n_feat_rows,
+            "float32": X32.nbytes / n_feat_rows,
+            # Peak allocation while building, including intermediate copies
+            "peak_astype_values_float64": peak_legacy / n_feat_rows,
+            "peak_feature_matrix_float64": peak64 / n_feat_rows,
+            "peak_feature_matrix_float32": peak32 / n_feat_rows,
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
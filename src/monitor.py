@@ -0,0 +1,263 @@
+import fcntl
+import json
+import math
+import os
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .utils import DAY_MS
+
+
+WINDOWS_MS = {"24h": DAY_MS, "7d": 7 * DAY_MS, "14d": 14 * DAY_MS}
+N_BINS = 10
+LOG_LOSS_EPS = 1e-15
+STATE_VERSION = 1
+
+# Retraining triggers, evaluated on the 7d window once it has enough resolved predictions
+DEGRADE_WINDOW = "7d"
+DEGRADE_MIN_COUNT = 24
+DEGRADE_MIN_ACCURACY = 0.55
+DEGRADE_MAX_BRIER = 0.25
+
+
+# (prediction time ms, P(positive), realized positive?)
+Event = Tuple[int, float, bool]
+
+
+class _Window:
+    """Running sums over resolved predictions made within the last `span_ms`."""
+
+    def __init__(self, span_ms: int):
+        self.span_ms = span_ms
+        self.events: Deque[Event] = deque()
+        self.count = 0
+        self.correct = 0
+        self.brier = 0.0
+        self.log_loss = 0.0
+        self.bin_count = [0] * N_BINS
+        self.bin_prob = [0.0] * N_BINS
+        self.bin_pos = [0] * N_BINS
+
+    def _apply(self, event: Event, sign: int) -> None:
+        _, p, positive = event
+        y = 1.0 if positive else 0.0
+        p_clip = min(max(p, LOG_LOSS_EPS), 1.0 - LOG_LOSS_EPS)
+        b = min(int(p * N_BINS), N_BINS - 1)
+        self.count += sign
+        self.correct += sign * int((p >= 0.5) == positive)
+        self.brier += sign * (p - y) ** 2
+        self.log_loss += sign * -(y * math.log(p_clip) + (1.0 - y) * math.log(1.0 - p_clip))
+        self.bin_count[b] += sign
+        self.bin_prob[b] += sign * p
+        self.bin_pos[b] += sign * int(positive)
+
+    def add(self, event: Event) -> None:
+        self.events.append(event)
+        self._apply(event, +1)
+
+    def evict(self, now_ms: int) -> None:
+        cutoff = now_ms - self.span_ms
+        while self.events and self.events[0][0] < cutoff:
+            self._apply(self.events.popleft(), -1)
+        if not self.events:
+            # Shed float drift accumulated by add/subtract once the window empties
+            self.brier = self.log_loss = 0.0
+            self.bin_prob = [0.0] * N_BINS
+
+    def snapshot(self) -> Dict[str, Any]:
+        n = self.count
+        return {
+            "count": n,
+            "correct": self.correct,
+            "accuracy": (self.correct / n) if n > 0 else None,
+            "brier": (self.brier / n) if n > 0 else None,
+            "log_loss": (self.log_loss / n) if n > 0 else None,
+            "reliability": [
+                {
+                    "bin": [i / N_BINS, (i + 1) / N_BINS],
+                    "count": self.bin_count[i],
+                    "mean_prob": self.bin_prob[i] / self.bin_count[i],
+                    "frac_positive": self.bin_pos[i] / self.bin_count[i],
+                }
+                for i in range(N_BINS)
+                if self.bin_count[i] > 0
+            ],
+        }
+
+
+class RollingMonitor:
+    """
+    Streaming accuracy / calibration over the predictions log.
+
+    Predictions wait in a time-ordered queue until the first funding event after them is
+    seen; resolving one and aging one out of a window are both O(1), so nothing is
+    recomputed from the log.
+    """
+
+    def __init__(self):
+        self.pending: Deque[Tuple[int, float]] = deque()
+        self.windows = {name: _Window(span) for name, span in WINDOWS_MS.items()}
+        self.dirty = False
+
+    def record_prediction(self, time_ms: int, prob_positive: float) -> None:
+        if self.pending and time_ms < self.pending[-1][0]:
+            return  # out of order / duplicate; the queue must stay sorted
+        self.pending.append((int(time_ms), float(prob_positive)))
+        self.dirty = True
+
+    def resolve(self, funding_times: Iterable[int], funding_rates: Iterable[float]) -> int:
+        """Resolve pending predictions against time-sorted funding events. Returns how many resolved."""
+        resolved = 0
+        for t, rate in zip(funding_times, funding_rates):
+            if rate != rate:  # NaN
+                continue
+            while self.pending and self.pending[0][0] < t:
+                pred_ms, p = self.pending.popleft()
+                event: Event = (pred_ms, p, bool(rate > 0))
+                for window in self.windows.values():
+                    window.add(event)
+                resolved += 1
+            if not self.pending:
+                break
+        if resolved:
+            self.dirty = True
+        return resolved
+
+    def oldest_pending_ms(self) -> Optional[int]:
+        return self.pending[0][0] if self.pending else None
+
+    def snapshot(self, now_ms: int) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for name, window in self.windows.items():
+            window.evict(now_ms)
+            out[name] = window.snapshot()
+        out["pending"] = len(self.pending)
+        return out
+
+    def accuracy(self, now_ms: int, window: str = "14d") -> Dict[str, Any]:
+        """Resolved predictions in `window`: {"count", "correct", "accuracy"} (None when empty)."""
+        w = self.windows[window]
+        w.evict(now_ms)
+        return {"count": w.count, "correct": w.correct, "accuracy": (w.correct / w.count) if w.count > 0 else None}
+
+    def degraded(self, now_ms: int) -> List[str]:
+        """Reasons the recent stream warrants retraining (empty when healthy or too few samples)."""
+        w = self.windows[DEGRADE_WINDOW]
+        w.evict(now_ms)
+        if w.count < DEGRADE_MIN_COUNT:
+            return []
+        reasons: List[str] = []
+        if w.correct / w.count < DEGRADE_MIN_ACCURACY:
+            reasons.append(f"{DEGRADE_WINDOW} accuracy {w.correct / w.count:.3f} < {DEGRADE_MIN_ACCURACY}")
+        if w.brier / w.count > DEGRADE_MAX_BRIER:
+            reasons.append(f"{DEGRADE_WINDOW} brier {w.brier / w.count:.3f} > {DEGRADE_MAX_BRIER}")
+        return reasons
+
+    def to_state(self) -> Dict[str, Any]:
+        # The widest window holds every event the narrower ones do
+        widest = max(self.windows.values(), key=lambda w: w.span_ms)
+        return {
+            "version": STATE_VERSION,
+            "pending": [list(x) for x in self.pending],
+            "events": [list(e) for e in widest.events],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "RollingMonitor":
+        mon = cls()
+        if state.get("version") != STATE_VERSION:
+            return mon
+        mon.pending = deque((int(t), float(p)) for t, p in state.get("pending", []))
+        for t, p, positive in state.get("events", []):
+            for window in mon.windows.values():
+                window.add((int(t), float(p), bool(positive)))
+        return mon
+
+
+def load_monitor(path: str) -> RollingMonitor:
+    if not os.path.exists(path):
+        return RollingMonitor()
+    with open(path) as f:
+        return RollingMonitor.from_state(json.load(f))
+
+
+def save_monitor(monitor: RollingMonitor, path: str) -> None:
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(monitor.to_state(), f)
+    os.replace(tmp, path)
+    monitor.dirty = False
+
+
+def seed_from_log(monitor: RollingMonitor, predictions_log: str) -> None:
+    """One-off bootstrap: queue every logged prediction so it resolves like a live one."""
+    if not os.path.exists(predictions_log):
+        return
+    logs = pd.read_csv(predictions_log)
+    if logs.empty:
+        return
+    times = pd.to_datetime(logs["time"], utc=True, format="ISO8601").astype("int64") // 10**6
+    for t, p in sorted(zip(times, logs["prob_positive"].astype(float))):
+        monitor.record_prediction(int(t), float(p))
+
+
+class SharedMonitor:
+    """
+    A process-local monitor backed by one state file shared between processes (gunicorn
+    workers, live_loop). Updates run under an exclusive file lock; the file is re-read
+    only when another process has rewritten it, and written only when something changed.
+    A missing state file is seeded from the predictions log once.
+    """
+
+    def __init__(self, path: str, predictions_log: Optional[str] = None):
+        self.path = path
+        self.predictions_log = predictions_log
+        self._monitor: Optional[RollingMonitor] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    @contextmanager
+    def update(self) -> Iterator[RollingMonitor]:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                stamp = self._file_stamp()
+                if self._monitor is None or stamp != self._stamp:
+                    self._monitor = load_monitor(self.path)
+                    if stamp is None and self.predictions_log is not None:
+                        seed_from_log(self._monitor, self.predictions_log)
+                        self._monitor.dirty = True
+                yield self._monitor
+                if self._monitor.dirty:
+                    save_monitor(self._monitor, self.path)
+                self._stamp = self._file_stamp()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def log_prediction(self, time_ms: int, direction: str, prob_positive: float) -> None:
+        """
+        Append a prediction to the predictions log and queue it in the monitor, both under
+        the monitor lock, so the log (lastComparison, /api/history, re-seeding a lost state
+        file) and the rolling metrics always see the same predictions.
+        """
+        with self.update() as mon:
+            if self.predictions_log is not None:
+                row = pd.DataFrame([{
+                    "time": datetime.fromtimestamp(time_ms / 1000, tz=timezone.utc).isoformat(),
+                    "direction": direction,
+                    "prob_positive": prob_positive,
+                }])
+                write_header = not os.path.exists(self.predictions_log) or os.path.getsize(self.predictions_log) == 0
+                row.to_csv(self.predictions_log, mode="a", header=write_header, index=False)
+            mon.record_prediction(time_ms, prob_positive)
@@ -0,0 +1,94 @@
+"""
+Opt-in profiling for the CLIs and web requests.
+
+`profile_run(name, enabled)` is a no-op `nullcontext` unless enabled. When enabled it
+runs cProfile and tracemalloc around the block and writes, under `profiles/`:
+
+- `<name>-<utc stamp>-<pid>.prof`: cProfile stats, for `python -m pstats`, snakeviz, etc.
+- the same name with `.json`: wall time, peak traced memory and the top functions.
+
+Paths are reported on stderr so stdout stays parseable JSON for the callers.
+"""
+import cProfile
+import io
+import itertools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from typing import Any, ContextManager, Dict, Iterator, Optional
+
+from .config import Paths
+
+
+TOP_FUNCTIONS = 25
+
+# tracemalloc is process-wide; concurrent profiled requests share one tracing session
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_run_ids = itertools.count(1)
+
+
+def add_profile_arg(parser: Any) -> None:
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile .prof and peak-memory .json for this run to profiles/")
+
+
+def _start_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+        _tracing_users += 1
+
+
+def _stop_tracing() -> int:
+    global _tracing_users
+    with _tracing_lock:
+        _, peak = tracemalloc.get_traced_memory()
+        _tracing_users -= 1
+        if _tracing_users == 0:
+            tracemalloc.stop()
+    return int(peak)
+
+
+def _top_functions(prof: cProfile.Profile) -> str:
+    buf = io.StringIO()
+    pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+    return buf.getvalue()
+
+
+@contextmanager
+def _profiled(name: str, out_dir: str) -> Iterator[Dict[str, Any]]:
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    base = os.path.join(out_dir, f"{name}-{stamp}-{os.getpid()}-{next(_run_ids)}")
+    report: Dict[str, Any] = {"name": name, "prof": f"{base}.prof", "summary": f"{base}.json"}
+    prof = cProfile.Profile()
+    _start_tracing()
+    started = time.perf_counter()
+    prof.enable()
+    try:
+        yield report
+    finally:
+        prof.disable()
+        report["wall_seconds"] = time.perf_counter() - started
+        report["peak_traced_bytes"] = _stop_tracing()
+        prof.dump_stats(report["prof"])
+        with open(report["summary"], "w") as f:
+            json.dump({**report, "top_cumulative": _top_functions(prof).splitlines()}, f, indent=2)
+        print(f"[profile] {name}: {report['wall_seconds']:.3f}s, peak {report['peak_traced_bytes'] / 2**20:.1f} MiB -> {report['prof']}", file=sys.stderr)
+
+
+def profile_run(name: str, enabled: bool, out_dir: Optional[str] = None) -> ContextManager[Optional[Dict[str, Any]]]:
+    """Profile the enclosed block when `enabled`; yields the report dict (None when disabled)."""
+    if not enabled:
+        return nullcontext()
+    return _profiled(name, out_dir or Paths().profiles_dir)
@@ -0,0 +1,147 @@
+"""
+Feature pruning for the fold ensembles.
+
+1. Train the usual TimeSeriesSplit ensemble and take permutation importance on each
+   fold's validation slice, averaged over folds.
+2. Among feature pairs with |corr| above --corr_threshold, mark the less important one.
+3. Candidates are those plus every feature whose mean importance is <= 0. The largest
+   prefix of them (least important first) whose removal keeps the OOF metric within
+   --tolerance is found by bisection, retraining once per step.
+
+The surviving columns go to a JSON file that train/train_cls read to restrict both the
+model inputs and what `build_features` computes.
+
+    python -m src.prune --task cls
+"""
+import argparse
+import json
+import os
+import warnings
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+from sklearn.inspection import permutation_importance
+from sklearn.model_selection import TimeSeriesSplit
+
+from . import train, train_cls
+from .config import Paths
+from .features import build_features
+from .fetch_data import read_merged
+
+
+def _task(task: str) -> Tuple[Callable[..., Any], Callable[..., Any], str, str]:
+    """(prepare_dataset, train_model, metric name, sklearn scorer)."""
+    if task == "cls":
+        return train_cls.prepare_dataset, train_cls.train_model, "accuracy", "accuracy"
+    return train.prepare_dataset, train.train_model, "mae", "neg_mean_absolute_error"
+
+
+def _within_tolerance(task: str, base: float, value: float, tolerance: float) -> bool:
+    # Classification: absolute accuracy drop. Regression: relative MAE increase.
+    if task == "cls":
+        return value >= base - tolerance
+    return value <= base * (1.0 + tolerance)
+
+
+def fold_importance(models: List[Any], X: np.ndarray, y: np.ndarray, scoring: str, n_repeats: int) -> np.ndarray:
+    tscv = TimeSeriesSplit(n_splits=len(models))
+    per_fold = []
+    for model, (_trn_idx, val_idx) in zip(models, tscv.split(X)):
+        res = permutation_importance(model, X[val_idx], y[val_idx], scoring=scoring, n_repeats=n_repeats, random_state=0)
+        per_fold.append(res["importances_mean"])
+    return np.mean(per_fold, axis=0)
+
+
+def collinear_drops(X: np.ndarray, cols: List[str], importance: np.ndarray, threshold: float) -> Dict[str, str]:
+    """For each highly correlated pair, the less important feature -> the one it duplicates."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.abs(np.corrcoef(X, rowvar=False))
+    dropped: Dict[str, str] = {}
+    order = np.argsort(-importance)
+    for a_pos, a in enumerate(order):
+        if cols[a] in dropped:
+            continue
+        for b in order[a_pos + 1:]:
+            if cols[b] not in dropped and corr[a, b] > threshold:
+                dropped[cols[b]] = cols[a]
+    return dropped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune low-importance / collinear features under a metric tolerance")
+    parser.add_argument("--task", choices=["cls", "reg"], default="cls")
+    parser.add_argument("--merged_csv", default=Paths().merged_csv)
+    parser.add_argument("--out", default=None, help="Selection JSON (default per task from Paths)")
+    parser.add_argument("--tolerance", type=float, default=0.005,
+                        help="Max accuracy drop (cls) or relative MAE increase (reg) allowed")
+    parser.add_argument("--corr_threshold", type=float, default=0.98)
+    parser.add_argument("--n_repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = Paths()
+    task: str = args.task
+    out_path = args.out or (paths.cls_feature_selection if task == "cls" else paths.feature_selection)
+    prepare, train_model, metric, scoring = _task(task)
+
+    if not os.path.exists(args.merged_csv):
+        raise SystemExit(f"Merged CSV not found at {args.merged_csv}. Run fetch_data.py first.")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        df_feat = build_features(read_merged(args.merged_csv))
+    X, y, cols, _ = prepare(df_feat)
+
+    models, base_metrics = train_model(X, y)
+    base = float(base_metrics[metric])
+    importance = fold_importance(models, X, y, scoring, int(args.n_repeats))
+
+    collinear = collinear_drops(X, cols, importance, float(args.corr_threshold))
+    reasons: Dict[str, str] = {c: f"collinear with {other}" for c, other in collinear.items()}
+    for c, imp in zip(cols, importance):
+        if imp <= 0 and c not in reasons:
+            reasons[c] = "non-positive permutation importance"
+    rank = {c: float(i) for c, i in zip(cols, importance)}
+    candidates = sorted(reasons, key=lambda c: rank[c])
+
+    def evaluate(drop: List[str]) -> float:
+        keep = [j for j, c in enumerate(cols) if c not in set(drop)]
+        _, m = train_model(np.ascontiguousarray(X[:, keep]), y)
+        return float(m[metric])
+
+    # Bisect on how many of the least important candidates can go
+    lo, hi = 0, len(candidates)
+    best_metric = base
+    if hi and _within_tolerance(task, base, (full := evaluate(candidates)), float(args.tolerance)):
+        lo, best_metric = hi, full
+    else:
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            value = evaluate(candidates[:mid])
+            if _within_tolerance(task, base, value, float(args.tolerance)):
+                lo, best_metric = mid, value
+            else:
+                hi = mid
+    dropped = candidates[:lo]
+    kept = [c for c in cols if c not in set(dropped)]
+
+    result = {
+        "task": task,
+        "features": kept,
+        "dropped": {c: reasons[c] for c in dropped},
+        "importance": rank,
+        "metric": metric,
+        "baseline": base,
+        "pruned": best_metric,
+        "tolerance": float(args.tolerance),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps({k: result[k] for k in ("metric", "baseline", "pruned")} | {
+        "n_features": len(cols), "n_kept": len(kept), "selection": out_path,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
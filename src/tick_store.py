@@ -0,0 +1,186 @@
+"""
+Intra-hour asset-context ticks.
+
+The collector samples `metaAndAssetCtxs` at a fixed cadence (one request covers every
+coin) and pushes each coin's premium/funding/prices into a fixed-size numpy ring buffer.
+New records are appended in batches to per-coin, per-UTC-day binary files, so the
+process holds at most `capacity` records per coin however long it runs, while the full
+history stays on disk for training.
+
+    python -m src.tick_store --coins HYPE --cadence 5
+"""
+import argparse
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .config import DEFAULT_COIN, Paths
+from .hyperliquid_api import extract_current_funding, get_meta_and_asset_ctxs
+from .utils import DAY_MS, ensure_dir, now_ms
+
+
+logger = logging.getLogger(__name__)
+
+TICK_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("premium", "<f8"),
+    ("funding", "<f8"),
+    ("markPx", "<f8"),
+    ("oraclePx", "<f8"),
+    ("openInterest", "<f8"),
+])
+# Context fields pushed per tick (every field after the timestamp)
+TICK_FIELDS = ("premium", "funding", "markPx", "oraclePx", "openInterest")
+# Two hours at a 2s cadence
+DEFAULT_CAPACITY = 3600
+
+
+def _day_file(spill_dir: str, coin: str, ts_ms: int) -> str:
+    day = datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+    return os.path.join(spill_dir, coin, f"{day}.ticks")
+
+
+class TickRing:
+    """Fixed-capacity ring of TICK_DTYPE records for one coin, spilling to disk in batches."""
+
+    def __init__(self, coin: str, capacity: int = DEFAULT_CAPACITY, spill_dir: Optional[str] = None, flush_every: int = 60):
+        self.coin = coin
+        self.buf = np.zeros(capacity, dtype=TICK_DTYPE)
+        self.head = 0
+        self.size = 0
+        self.spill_dir = spill_dir
+        # Records must reach disk before the ring overwrites them
+        self.flush_every = max(1, min(flush_every, capacity))
+        self._unflushed = 0
+        if spill_dir is not None:
+            self._restore()
+
+    @property
+    def capacity(self) -> int:
+        return int(self.buf.shape[0])
+
+    def push(self, ts: int, ctx: Dict[str, float]) -> None:
+        rec = self.buf[self.head]
+        rec["ts"] = ts
+        for name in TICK_FIELDS:
+            v = ctx.get(name)
+            rec[name] = float(v) if isinstance(v, (int, float)) else np.nan
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self._unflushed = min(self._unflushed + 1, self.capacity)
+        if self._unflushed >= self.flush_every:
+            self.flush()
+
+    def ordered(self, last: Optional[int] = None) -> NDArray[np.void]:
+        """Oldest-to-newest copy of the buffered records (at most `last` of them)."""
+        n = self.size if last is None else min(last, self.size)
+        idx = (self.head - n + np.arange(n)) % self.capacity
+        return self.buf[idx]
+
+    def flush(self) -> None:
+        if self.spill_dir is None or self._unflushed == 0:
+            self._unflushed = 0
+            return
+        recs = self.ordered(self._unflushed)
+        days = recs["ts"] // DAY_MS
+        for day in np.unique(days):
+            path = _day_file(self.spill_dir, self.coin, int(day) * DAY_MS)
+            ensure_dir(os.path.dirname(path))
+            with open(path, "ab") as f:
+                recs[days == day].tofile(f)
+        self._unflushed = 0
+
+    def _restore(self) -> None:
+        """Refill the ring from the newest spill files after a restart."""
+        coin_dir = os.path.join(str(self.spill_dir), self.coin)
+        if not os.path.isdir(coin_dir):
+            return
+        chunks: List[NDArray[np.void]] = []
+        have = 0
+        for name in sorted(os.listdir(coin_dir), reverse=True):
+            if not name.endswith(".ticks") or have >= self.capacity:
+                continue
+            # Tolerate a partially written trailing record
+            with open(os.path.join(coin_dir, name), "rb") as f:
+                raw = f.read()
+            arr = np.frombuffer(raw[: len(raw) - len(raw) % TICK_DTYPE.itemsize], dtype=TICK_DTYPE)
+            chunks.insert(0, arr[-(self.capacity - have):])
+            have += len(chunks[0])
+        if not chunks:
+            return
+        recs = np.concatenate(chunks)[-self.capacity:]
+        self.buf[: len(recs)] = recs
+        self.size = len(recs)
+        self.head = self.size % self.capacity
+
+
+def load_ticks(spill_dir: str, coin: str, start_ms: int, end_ms: int) -> NDArray[np.void]:
+    """Read spilled ticks in [start_ms, end_ms) from the day files, time-sorted."""
+    chunks: List[NDArray[np.void]] = []
+    for day in range(start_ms // DAY_MS, end_ms // DAY_MS + 1):
+        path = _day_file(spill_dir, coin, day * DAY_MS)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                raw = f.read()
+            chunks.append(np.frombuffer(raw[: len(raw) - len(raw) % TICK_DTYPE.itemsize], dtype=TICK_DTYPE))
+    if not chunks:
+        return np.zeros(0, dtype=TICK_DTYPE)
+    recs = np.concatenate(chunks)
+    recs = recs[(recs["ts"] >= start_ms) & (recs["ts"] < end_ms)]
+    return recs[np.argsort(recs["ts"], kind="stable")]
+
+
+def tick_arrays(recs: NDArray[np.void]) -> Tuple[NDArray[np.int64], NDArray[np.float64]]:
+    """(ts, premium) pair in the form `features.build_features(ticks=...)` takes."""
+    return recs["ts"].astype(np.int64), recs["premium"].astype(np.float64)
+
+
+class TickCollector:
+    def __init__(self, coins: List[str], capacity: int = DEFAULT_CAPACITY, spill_dir: Optional[str] = None, flush_every: int = 60):
+        self.rings = {c: TickRing(c, capacity, spill_dir, flush_every) for c in coins}
+
+    def sample(self) -> None:
+        ts = now_ms()
+        meta_and_ctxs = get_meta_and_asset_ctxs()
+        for coin, ring in self.rings.items():
+            ctx = extract_current_funding(meta_and_ctxs, coin)
+            if ctx is not None:
+                ring.push(ts, ctx)
+
+    def flush(self) -> None:
+        for ring in self.rings.values():
+            ring.flush()
+
+    def run(self, cadence_sec: float) -> None:
+        try:
+            while True:
+                try:
+                    self.sample()
+                except Exception:
+                    logger.exception("Tick sample failed")
+                # Stay on the cadence grid rather than drifting by request latency
+                time.sleep(cadence_sec - (time.time() % cadence_sec))
+        finally:
+            self.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--coins", nargs="+", default=[DEFAULT_COIN])
+    parser.add_argument("--cadence", type=float, default=5.0, help="Seconds between samples")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY, help="Ticks kept in memory per coin")
+    parser.add_argument("--flush_every", type=int, default=60, help="Ticks between appends to disk")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    collector = TickCollector(list(args.coins), int(args.capacity), Paths().ticks_dir, int(args.flush_every))
+    collector.run(float(args.cadence))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import argparse
 import json
 import os
-from typing import List, Tuple, Protocol, runtime_checkable, cast
+import time
+from typing import Any, Dict, List, Optional, Tuple, Protocol, runtime_checkable, cast
 
 import joblib
 import numpy as np
@@ -11,8 +12,13 @@ from sklearn.ensemble import HistGradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, r2_score
 from sklearn.model_selection import TimeSeriesSplit
 
+from .artifact import artifact_for, export_regressor
+from .boosting import fit_early_stopped, fit_without_early_stopping, fold_deadline, fold_slice, regression_loss
+from .chunked import DEFAULT_CHUNK_ROWS, build_feature_store
 from .config import Paths
-from .features import build_features
+from .features import FEATURE_DROP_COLS, build_features, feature_matrix, load_feature_selection, numeric_feature_columns
+from .fetch_data import read_merged
+from .profiling import add_profile_arg, profile_run
 
 
 TARGET_COL = "fundingRate"
@@ -24,7 +30,7 @@ class RegressorProtocol(Protocol):
         ...
 
 
-def prepare_dataset(df: pd.DataFrame) -> Tuple[NDArray[np.float64], NDArray[np.float64], List[str], pd.DataFrame]:
+def prepare_dataset(df: pd.DataFrame, dtype: type = np.float64, columns: Optional[List[str]] = None) -> Tuple[NDArray[np.float64], NDArray[np.float64], List[str], pd.DataFrame]:
     df = df.copy()
     # Target is next period funding rate
     df["target_next_funding"] = df[TARGET_COL].shift(-1)
@@ -33,24 +39,36 @@ def prepare_dataset(df: pd.DataFrame) -> Tuple[NDArray[np.float64], NDArray[np.f
     df = df.dropna().reset_index(drop=True)
 
     # Feature columns
-    drop_cols = {
-        "ts", "i", "s", "n", "o", "h", "l", "hour", TARGET_COL, "time", "target_next_funding"
-    }
-    feature_cols = [c for c in df.columns if c not in drop_cols and df[c].dtype != "O"]
+    # `columns` pins the inputs to a pruned selection (see src/prune.py)
+    feature_cols = list(columns) if columns is not None else numeric_feature_columns(df, FEATURE_DROP_COLS)
 
-    X_arr = cast(NDArray[np.float64], np.asarray(df[feature_cols].astype(float).values, dtype=np.float64))
+    X_arr = cast(NDArray[np.float64], feature_matrix(df, feature_cols, dtype))
     y_arr = cast(NDArray[np.float64], np.asarray(df["target_next_funding"].astype(float).values, dtype=np.float64))
     return X_arr, y_arr, feature_cols, df
 
 
-def train_model(X: NDArray[np.float64], y: NDArray[np.float64], n_splits: int = 5) -> Tuple[List[HistGradientBoostingRegressor], dict[str, float]]:
+def train_model(
+    X: NDArray[np.float64],
+    y: NDArray[np.float64],
+    n_splits: int = 5,
+    early_stopping: bool = True,
+    time_budget_sec: Optional[float] = None,
+    fit_log: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[List[HistGradientBoostingRegressor], dict[str, float]]:
+    """
+    `early_stopping` picks each fold's iteration count on a time-ordered holdout (see
+    src/boosting.py); `time_budget_sec` caps the whole ensemble's wall clock. Per-fold
+    iteration counts are appended to `fit_log` when given.
+    """
     tscv = TimeSeriesSplit(n_splits=n_splits)
+    budget_end = None if time_budget_sec is None else time.monotonic() + time_budget_sec
     oof_preds: NDArray[np.float64] = np.zeros_like(y)
     models: List[HistGradientBoostingRegressor] = []
 
     for _fold, (trn_idx, val_idx) in enumerate(tscv.split(X), start=1):
-        X_trn, y_trn = X[trn_idx], y[trn_idx]
-        X_val: NDArray[np.float64] = X[val_idx]
+        trn, val = fold_slice(trn_idx), fold_slice(val_idx)
+        X_trn, y_trn = X[trn], y[trn]
+        X_val: NDArray[np.float64] = X[val]
 
         model = HistGradientBoostingRegressor(
             max_depth=None,
@@ -59,9 +77,16 @@ def train_model(X: NDArray[np.float64], y: NDArray[np.float64], n_splits: int =
             l2_regularization=1e-2,
             random_state=42,
         )
-        model.fit(X_trn, y_trn)
+        if early_stopping:
+            fit = fit_early_stopped(model, X_trn, y_trn, regression_loss, deadline=fold_deadline(budget_end, n_splits - _fold + 1))
+            model = fit.pop("model")
+        else:
+            fit = fit_without_early_stopping(model, X_trn, y_trn, fold_deadline(budget_end, n_splits - _fold + 1))
+            model = fit.pop("model")
+        if fit_log is not None:
+            fit_log.append({"fold": _fold, **fit})
         preds: NDArray[np.float64] = model.predict(X_val)
-        oof_preds[val_idx] = preds
+        oof_preds[val] = preds
         models.append(model)
 
     mae = float(mean_absolute_error(y, oof_preds))
@@ -74,29 +99,51 @@ def main():
     _ = parser.add_argument("--merged_csv", default=Paths().merged_csv)
     _ = parser.add_argument("--model_out", default=Paths().model_file)
     _ = parser.add_argument("--meta_out", default=Paths().model_meta)
+    _ = parser.add_argument("--artifact_out", default=None, help="Flat artifact (default: --model_out with an .hfm suffix)")
+    _ = parser.add_argument("--feature_selection", default=Paths().feature_selection, help="Pruned feature list from src.prune; ignored if missing")
+    _ = parser.add_argument("--all_features", action="store_true", help="Train on every feature even if a selection exists")
+    _ = parser.add_argument("--no_early_stopping", action="store_true", help="Always run the full max_iter boosting rounds")
+    _ = parser.add_argument("--time_budget_sec", type=float, default=None, help="Wall-clock cap for training the whole ensemble")
+    _ = parser.add_argument("--float32", action="store_true", help="Build the feature matrix as float32 to halve its memory")
+    _ = parser.add_argument("--chunked", action="store_true", help="Stream the CSV in chunks into a memory-mapped feature matrix")
+    _ = parser.add_argument("--chunk_rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    _ = parser.add_argument("--features_dir", default=os.path.join(Paths().features_dir, "reg"))
+    add_profile_arg(parser)
     args = parser.parse_args()
 
-    merged_csv: str = str(args.merged_csv)
-    model_out: str = str(args.model_out)
-    meta_out: str = str(args.meta_out)
-
-    if not os.path.exists(merged_csv):
-        raise SystemExit(f"Merged CSV not found at {merged_csv}. Run fetch_data.py first.")
-
-    df: pd.DataFrame = pd.read_csv(merged_csv)
-    df_feat = build_features(df)
-    X, y, feature_cols, df_ready = prepare_dataset(df_feat)
-
-    models, metrics = train_model(X, y)
-
-    # Save the last model as production model and meta
-    os.makedirs(os.path.dirname(model_out), exist_ok=True)
-    _ = joblib.dump({"models": models, "feature_cols": feature_cols}, model_out)
-
-    with open(meta_out, "w") as f:
-        json.dump({"metrics": metrics, "num_rows": int(df_ready.shape[0])}, f, indent=2)
-
-    print(json.dumps({"metrics": metrics, "model": model_out, "meta": meta_out}, indent=2))
+    with profile_run("train", args.profile):
+        merged_csv: str = str(args.merged_csv)
+        model_out: str = str(args.model_out)
+        meta_out: str = str(args.meta_out)
+        artifact_out: str = str(args.artifact_out or artifact_for(model_out))
+
+        if not os.path.exists(merged_csv):
+            raise SystemExit(f"Merged CSV not found at {merged_csv}. Run fetch_data.py first.")
+
+        selection = None if args.all_features else load_feature_selection(str(args.feature_selection))
+        dtype = np.float32 if args.float32 else np.float64
+        if args.chunked:
+            X, y, feature_cols = build_feature_store(merged_csv, str(args.features_dir), prepare_dataset, selection, dtype, int(args.chunk_rows))
+        else:
+            df: pd.DataFrame = read_merged(merged_csv)
+            df_feat = build_features(df, columns=selection)
+            X, y, feature_cols, _ = prepare_dataset(df_feat, dtype, selection)
+
+        fit_log: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+        models, metrics = train_model(X, y, early_stopping=not args.no_early_stopping, time_budget_sec=args.time_budget_sec, fit_log=fit_log)
+        train_seconds = time.perf_counter() - started
+
+        # Save the last model as production model and meta
+        os.makedirs(os.path.dirname(model_out), exist_ok=True)
+        _ = joblib.dump({"models": models, "feature_cols": feature_cols}, model_out)
+        # Flat, memory-mappable copy used for serving (no sklearn import, no unpickling)
+        export_regressor(models, feature_cols, artifact_out)
+
+        with open(meta_out, "w") as f:
+            json.dump({"metrics": metrics, "num_rows": int(len(y)), "train_seconds": train_seconds, "folds": fit_log}, f, indent=2)
+
+        print(json.dumps({"metrics": metrics, "train_seconds": train_seconds, "n_iter": [f["n_iter"] for f in fit_log], "model": model_out, "artifact": artifact_out, "meta": meta_out}, indent=2))
 
 
 if __name__ == "__main__":
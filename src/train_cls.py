@@ -1,7 +1,8 @@
 import argparse
 import json
 import os
-from typing import List, Tuple, Protocol, runtime_checkable, cast
+import time
+from typing import Any, Dict, List, Optional, Tuple, Protocol, runtime_checkable, cast
 
 import joblib
 import numpy as np
@@ -14,8 +15,13 @@ from sklearn.calibration import CalibratedClassifierCV
 from collections import Counter
 from datetime import datetime, timezone
 
+from .artifact import artifact_for, export_classifier
+from .boosting import classification_loss, fit_early_stopped, fit_without_early_stopping, fold_deadline, fold_slice
+from .chunked import DEFAULT_CHUNK_ROWS, build_feature_store
 from .config import Paths
-from .features import build_features
+from .features import FEATURE_DROP_COLS, build_features, feature_matrix, load_feature_selection, numeric_feature_columns
+from .fetch_data import read_merged
+from .profiling import add_profile_arg, profile_run
 
 
 TARGET_COL = "fundingRate"
@@ -27,18 +33,16 @@ class ClassifierProtocol(Protocol):
         ...
 
 
-def prepare_dataset(df: pd.DataFrame) -> Tuple[NDArray[np.float64], NDArray[np.int_], List[str], pd.DataFrame]:
+def prepare_dataset(df: pd.DataFrame, dtype: type = np.float64, columns: Optional[List[str]] = None) -> Tuple[NDArray[np.float64], NDArray[np.int_], List[str], pd.DataFrame]:
     df = df.copy()
     # Define classification target: sign of next funding (1 if > 0 else 0)
     df["target_next_funding"] = df[TARGET_COL].shift(-1)
     df = df.dropna().reset_index(drop=True)
     df["label"] = (df["target_next_funding"] > 0).astype(int)
 
-    drop_cols = {
-        "ts", "i", "s", "n", "o", "h", "l", "hour", TARGET_COL, "time", "target_next_funding", "label"
-    }
-    feature_cols = [c for c in df.columns if c not in drop_cols and df[c].dtype != "O"]
-    X_arr = cast(NDArray[np.float64], np.asarray(df[feature_cols].astype(float).values, dtype=np.float64))
+    # `columns` pins the inputs to a pruned selection (see src/prune.py)
+    feature_cols = list(columns) if columns is not None else numeric_feature_columns(df, FEATURE_DROP_COLS | {"label"})
+    X_arr = cast(NDArray[np.float64], feature_matrix(df, feature_cols, dtype))
     y_arr = cast(NDArray[np.int_], np.asarray(df["label"].astype(int).values, dtype=np.int_))
     return X_arr, y_arr, feature_cols, df
 
@@ -50,14 +54,24 @@ def compute_sample_weights(y: NDArray[np.int_]) -> NDArray[np.float64]:
     return weights
 
 
-def train_model(X: NDArray[np.float64], y: NDArray[np.int_], n_splits: int = 5) -> Tuple[List[CalibratedClassifierCV], dict[str, float]]:
+def train_model(
+    X: NDArray[np.float64],
+    y: NDArray[np.int_],
+    n_splits: int = 5,
+    early_stopping: bool = True,
+    time_budget_sec: Optional[float] = None,
+    fit_log: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[List[CalibratedClassifierCV], dict[str, float]]:
+    """Same early stopping / budget / `fit_log` options as `train.train_model`."""
     tscv = TimeSeriesSplit(n_splits=n_splits)
+    budget_end = None if time_budget_sec is None else time.monotonic() + time_budget_sec
     oof_proba: NDArray[np.float64] = np.zeros(shape=(len(y),), dtype=np.float64)
     models: List[CalibratedClassifierCV] = []
 
     for _fold, (trn_idx, val_idx) in enumerate(tscv.split(X), start=1):
-        X_trn, y_trn = X[trn_idx], y[trn_idx]
-        X_val, y_val = X[val_idx], y[val_idx]
+        trn, val = fold_slice(trn_idx), fold_slice(val_idx)
+        X_trn, y_trn = X[trn], y[trn]
+        X_val, y_val = X[val], y[val]
 
         base = HistGradientBoostingClassifier(
             max_depth=None,
@@ -67,13 +81,23 @@ def train_model(X: NDArray[np.float64], y: NDArray[np.int_], n_splits: int = 5)
             random_state=42,
         )
         w_trn = compute_sample_weights(y_trn)
-        base.fit(X_trn, y_trn, sample_weight=w_trn)
+        if early_stopping:
+            fit = fit_early_stopped(
+                base, X_trn, y_trn, classification_loss, sample_weight=w_trn,
+                deadline=fold_deadline(budget_end, n_splits - _fold + 1),
+            )
+            base = fit.pop("model")
+        else:
+            fit = fit_without_early_stopping(base, X_trn, y_trn, fold_deadline(budget_end, n_splits - _fold + 1), sample_weight=w_trn)
+            base = fit.pop("model")
+        if fit_log is not None:
+            fit_log.append({"fold": _fold, **fit})
 
         # Calibrate probabilities on validation slice
         cal = CalibratedClassifierCV(base, method="isotonic", cv="prefit")
         _ = cal.fit(X_val, y_val)
         proba: NDArray[np.float64] = cast(NDArray[np.float64], cal.predict_proba(X_val)[:, 1])
-        oof_proba[val_idx] = proba
+        oof_proba[val] = proba
         models.append(cal)
 
     acc = float(accuracy_score(y, (oof_proba >= 0.5).astype(int)))
@@ -89,28 +113,50 @@ def main():
     _ = parser.add_argument("--merged_csv", default=Paths().merged_csv)
     _ = parser.add_argument("--model_out", default=Paths().cls_model_file)
     _ = parser.add_argument("--meta_out", default=Paths().cls_model_meta)
+    _ = parser.add_argument("--artifact_out", default=None, help="Flat artifact (default: --model_out with an .hfm suffix)")
+    _ = parser.add_argument("--feature_selection", default=Paths().cls_feature_selection, help="Pruned feature list from src.prune; ignored if missing")
+    _ = parser.add_argument("--all_features", action="store_true", help="Train on every feature even if a selection exists")
+    _ = parser.add_argument("--no_early_stopping", action="store_true", help="Always run the full max_iter boosting rounds")
+    _ = parser.add_argument("--time_budget_sec", type=float, default=None, help="Wall-clock cap for training the whole ensemble")
+    _ = parser.add_argument("--float32", action="store_true", help="Build the feature matrix as float32 to halve its memory")
+    _ = parser.add_argument("--chunked", action="store_true", help="Stream the CSV in chunks into a memory-mapped feature matrix")
+    _ = parser.add_argument("--chunk_rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    _ = parser.add_argument("--features_dir", default=os.path.join(Paths().features_dir, "cls"))
+    add_profile_arg(parser)
     args = parser.parse_args()
 
-    merged_csv: str = str(args.merged_csv)
-    model_out: str = str(args.model_out)
-    meta_out: str = str(args.meta_out)
-
-    if not os.path.exists(merged_csv):
-        raise SystemExit(f"Merged CSV not found at {merged_csv}. Run fetch_data.py first.")
-
-    df: pd.DataFrame = pd.read_csv(merged_csv)
-    df_feat = build_features(df)
-    X, y, feature_cols, df_ready = prepare_dataset(df_feat)
-
-    models, metrics = train_model(X, y)
-
-    os.makedirs(os.path.dirname(model_out), exist_ok=True)
-    _ = joblib.dump({"models": models, "feature_cols": feature_cols}, model_out)
-
-    with open(meta_out, "w") as f:
-        json.dump({"metrics": metrics, "num_rows": int(df_ready.shape[0]), "trained_at": datetime.now(timezone.utc).isoformat()}, f, indent=2)
-
-    print(json.dumps({"metrics": metrics, "model": model_out, "meta": meta_out}, indent=2))
+    with profile_run("train_cls", args.profile):
+        merged_csv: str = str(args.merged_csv)
+        model_out: str = str(args.model_out)
+        meta_out: str = str(args.meta_out)
+        artifact_out: str = str(args.artifact_out or artifact_for(model_out))
+
+        if not os.path.exists(merged_csv):
+            raise SystemExit(f"Merged CSV not found at {merged_csv}. Run fetch_data.py first.")
+
+        selection = None if args.all_features else load_feature_selection(str(args.feature_selection))
+        dtype = np.float32 if args.float32 else np.float64
+        if args.chunked:
+            X, y, feature_cols = build_feature_store(merged_csv, str(args.features_dir), prepare_dataset, selection, dtype, int(args.chunk_rows))
+        else:
+            df: pd.DataFrame = read_merged(merged_csv)
+            df_feat = build_features(df, columns=selection)
+            X, y, feature_cols, _ = prepare_dataset(df_feat, dtype, selection)
+
+        fit_log: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+        models, metrics = train_model(X, y, early_stopping=not args.no_early_stopping, time_budget_sec=args.time_budget_sec, fit_log=fit_log)
+        train_seconds = time.perf_counter() - started
+
+        os.makedirs(os.path.dirname(model_out), exist_ok=True)
+        _ = joblib.dump({"models": models, "feature_cols": feature_cols}, model_out)
+        # Flat, memory-mappable copy used for serving (no sklearn import, no unpickling)
+        export_classifier(models, feature_cols, artifact_out)
+
+        with open(meta_out, "w") as f:
+            json.dump({"metrics": metrics, "num_rows": int(len(y)), "trained_at": datetime.now(timezone.utc).isoformat(), "train_seconds": train_seconds, "folds": fit_log}, f, indent=2)
+
+        print(json.dumps({"metrics": metrics, "train_seconds": train_seconds, "n_iter": [f["n_iter"] for f in fit_log], "model": model_out, "artifact": artifact_out, "meta": meta_out}, indent=2))
 
 
 if __name__ == "__main__":
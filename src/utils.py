@@ -2,6 +2,10 @@ import os
 from datetime import datetime, timezone, timedelta
 
 
+HOUR_MS = 60 * 60 * 1000
+DAY_MS = 24 * HOUR_MS
+
+
 def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
@@ -18,4 +22,12 @@ def now_ms() -> int:
 def floor_hour_ms(ts_ms: int) -> int:
     dt = datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc)
     floored = dt.replace(minute=0, second=0, microsecond=0)
-    return int(floored.timestamp() * 1000) 
\ No newline at end of file
+    return int(floored.timestamp() * 1000) 
+
+
+_INTERVAL_UNITS_MS = {"m": 60 * 1000, "h": 60 * 60 * 1000, "d": 24 * 60 * 60 * 1000, "w": 7 * 24 * 60 * 60 * 1000}
+
+
+def interval_ms(interval: str) -> int:
+    """Length of a candle interval such as "1m", "15m", "1h", "1d" in milliseconds."""
+    return int(interval[:-1]) * _INTERVAL_UNITS_MS[interval[-1]]
\ No newline at end of file
@@ -0,0 +1,11 @@
+"""Production entry point: `gunicorn -c gunicorn.conf.py wsgi:app`."""
+from app import create_app, warmup_state
+
+
+# Imported once in the gunicorn master (preload_app): the warm-up (models unpickled,
+# caches filled, first predict) runs before fork, so every worker starts ready and
+# shares the loaded models copy-on-write.
+app = create_app(warm="sync")
+warmup = warmup_state()
+
+__all__ = ["app", "warmup"]